@@ -1,87 +1,133 @@
 from __future__ import annotations
 
-from datetime import datetime, timedelta, timezone
-from typing import Any
+import time
+from collections import OrderedDict
+from typing import Any, Iterable
 
+import msgpack
+import orjson
+
+from . import db as db_module
 from .config import settings
 from .db import db
 
+_UPSERT_OSV_SQL = """
+INSERT INTO osv_cache (ecosystem, package, version, fetched_at, payload)
+VALUES (?, ?, ?, ?, ?)
+ON CONFLICT(ecosystem, package, version) DO UPDATE SET
+    fetched_at=excluded.fetched_at,
+    payload=excluded.payload
+"""
+
+_UPSERT_OSV_VULN_SQL = """
+INSERT INTO osv_vuln_cache (vuln_id, fetched_at, payload)
+VALUES (?, ?, ?)
+ON CONFLICT(vuln_id) DO UPDATE SET
+    fetched_at=excluded.fetched_at,
+    payload=excluded.payload
+"""
+
+# Parsed get_cached_osv() results held in process, most recently used last,
+# keyed by (database path, ecosystem, package, version) like db._meta_cache,
+# as (expires_at, payload). Callers treat cached payloads as read-only.
+OSV_MEMORY_CACHE_SIZE = 4096
+_osv_memory: OrderedDict[tuple[str, str, str, str], tuple[float, dict[str, Any]]] = OrderedDict()
+
+
+def _now() -> float:
+    # Indirection so tests can pin the clock with monkeypatch.
+    return time.time()
+
+
+def clear_memory_cache() -> None:
+    """Forget OSV payloads cached in process, e.g. after deleting osv_cache rows."""
+    _osv_memory.clear()
+
 
 def cache_osv_result(ecosystem: str, package: str, version: str, payload: dict[str, Any]) -> None:
-    now = datetime.now(timezone.utc)
     with db() as conn:
         conn.execute(
-            """
-            INSERT INTO osv_cache (ecosystem, package, version, fetched_at, json)
-            VALUES (?, ?, ?, ?, ?)
-            ON CONFLICT(ecosystem, package, version) DO UPDATE SET
-                fetched_at=excluded.fetched_at,
-                json=excluded.json
-            """,
-            (ecosystem, package, version, now.isoformat(), json_dumps(payload)),
+            _UPSERT_OSV_SQL,
+            (ecosystem, package, version, int(_now()), _pack(payload)),
         )
+    _osv_memory.pop((db_module.settings.database_path, ecosystem, package, version), None)
+
+
+def cache_osv_result_many(entries: Iterable[tuple[str, str, str, dict[str, Any]]]) -> None:
+    """Store several (ecosystem, package, version, payload) results in one transaction."""
+    now = int(_now())
+    rows = [
+        (ecosystem, package, version, now, _pack(payload))
+        for ecosystem, package, version, payload in entries
+    ]
+    with db(immediate=True) as conn:
+        conn.executemany(_UPSERT_OSV_SQL, rows)
+    path = db_module.settings.database_path
+    for ecosystem, package, version, _, _ in rows:
+        _osv_memory.pop((path, ecosystem, package, version), None)
 
 
 def get_cached_osv(ecosystem: str, package: str, version: str) -> dict[str, Any] | None:
-    ttl = timedelta(hours=settings.osv_ttl_hours)
-    threshold = datetime.now(timezone.utc) - ttl
+    key = (db_module.settings.database_path, ecosystem, package, version)
+    now = _now()
+    hit = _osv_memory.get(key)
+    if hit is not None:
+        if hit[0] > now:
+            _osv_memory.move_to_end(key)
+            return hit[1]
+        del _osv_memory[key]
+    ttl_seconds = settings.osv_ttl_hours * 3600
     with db() as conn:
         row = conn.execute(
-            "SELECT fetched_at, json FROM osv_cache WHERE ecosystem=? AND package=? AND version=?",
-            (ecosystem, package, version),
+            "SELECT fetched_at, payload FROM osv_cache"
+            " WHERE ecosystem=? AND package=? AND version=? AND fetched_at>=?",
+            (ecosystem, package, version, int(now) - ttl_seconds),
         ).fetchone()
-        if not row:
-            return None
-        fetched_at = datetime.fromisoformat(row[0])
-        if fetched_at < threshold:
-            return None
-        payload = json_loads(row[1])
-        if not isinstance(payload, dict):
-            return None
-        return payload
+    if row is None:
+        return None
+    fetched_at, blob = row
+    payload = _unpack(blob)
+    if not isinstance(payload, dict):
+        return None
+    _osv_memory[key] = (fetched_at + ttl_seconds, payload)
+    if len(_osv_memory) > OSV_MEMORY_CACHE_SIZE:
+        _osv_memory.popitem(last=False)
+    return payload
 
 
 def cache_osv_vuln(vuln_id: str, payload: dict[str, Any]) -> None:
-    now = datetime.now(timezone.utc)
     with db() as conn:
-        conn.execute(
-            """
-            INSERT INTO osv_vuln_cache (vuln_id, fetched_at, json)
-            VALUES (?, ?, ?)
-            ON CONFLICT(vuln_id) DO UPDATE SET
-                fetched_at=excluded.fetched_at,
-                json=excluded.json
-            """,
-            (vuln_id, now.isoformat(), json_dumps(payload)),
-        )
+        conn.execute(_UPSERT_OSV_VULN_SQL, (vuln_id, int(_now()), _pack(payload)))
 
 
 def get_cached_osv_vuln(vuln_id: str) -> dict[str, Any] | None:
-    ttl = timedelta(hours=settings.osv_ttl_hours)
-    threshold = datetime.now(timezone.utc) - ttl
+    threshold = int(_now()) - settings.osv_ttl_hours * 3600
     with db() as conn:
         row = conn.execute(
-            "SELECT fetched_at, json FROM osv_vuln_cache WHERE vuln_id=?",
-            (vuln_id,),
+            "SELECT payload FROM osv_vuln_cache WHERE vuln_id=? AND fetched_at>=?",
+            (vuln_id, threshold),
         ).fetchone()
-        if not row:
-            return None
-        fetched_at = datetime.fromisoformat(row[0])
-        if fetched_at < threshold:
-            return None
-        payload = json_loads(row[1])
-        if not isinstance(payload, dict):
-            return None
-        return payload
+    if row is None:
+        return None
+    (blob,) = row
+    payload = _unpack(blob)
+    if not isinstance(payload, dict):
+        return None
+    return payload
+
+
+def _pack(data: Any) -> bytes:
+    packed: bytes = msgpack.packb(data, use_bin_type=True)
+    return packed
 
 
-def json_dumps(data: Any) -> str:
-    import json
+def _unpack(data: bytes) -> Any:
+    return msgpack.unpackb(data, raw=False)
 
-    return json.dumps(data, separators=(",", ":"), sort_keys=True)
 
+def json_dumps(data: Any) -> bytes:
+    return orjson.dumps(data, option=orjson.OPT_SORT_KEYS)
 
-def json_loads(s: str) -> Any:
-    import json
 
-    return json.loads(s)
+def json_loads(s: str | bytes) -> Any:
+    return orjson.loads(s)
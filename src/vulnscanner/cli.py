@@ -2,21 +2,35 @@ from __future__ import annotations
 
 import asyncio
 import csv
+import importlib
 import io
 import json
+import logging
 import re
 from datetime import datetime, timedelta, timezone
 from pathlib import Path
-from typing import Any, Optional
+from types import ModuleType
+from typing import Any, Coroutine, Optional, TypeVar
 
 import click
 
+from .caching import clear_memory_cache
+from .config import settings
 from .db import db, delete_meta, ensure_database, get_meta
 from .epss import sync_epss
 from .kev import sync_kev
 from .nvd import sync_nvd_delta
 from .osv import ScanFinding, ScanResult, filter_findings, policy_failures, scan_dependency_manifest
 
+uvloop: ModuleType | None
+try:
+    # Imported by name so type checking works whether or not it is installed.
+    uvloop = importlib.import_module("uvloop")
+except ImportError:  # pragma: no cover - optional speedup, not installed on Windows
+    uvloop = None
+
+T = TypeVar("T")
+
 CONTEXT_SETTINGS = {"help_option_names": ["-h", "--help"], "max_content_width": 110}
 
 
@@ -76,13 +90,9 @@ def nvd_sync(since_str: Optional[str], until_str: Optional[str], debug: bool) ->
       vulnscanner nvd-sync --since 7d --until now
     """
     if debug:
-        import logging
-
         logging.basicConfig(level=logging.DEBUG)
 
     # Show rate limiting info
-    from .config import settings
-
     if settings.nvd_api_key:
         click.echo(f"🔑 Using API key, rate limit: {settings.nvd_max_per_30s}/30s")
     else:
@@ -95,7 +105,7 @@ def nvd_sync(since_str: Optional[str], until_str: Optional[str], debug: bool) ->
         raise click.BadParameter("--since must be earlier than --until")
     click.echo(f"🚀 Syncing from {since} to {until}")
     try:
-        stats = asyncio.run(sync_nvd_delta(since, until))
+        stats = _run_async(sync_nvd_delta(since, until))
         click.echo(f"✅ Sync complete: {stats['cves']} CVEs, {stats['pages']} pages")
     except Exception as e:
         error_message = str(e)
@@ -255,8 +265,6 @@ def scan_deps(
       vulnscanner scan-deps package-lock.json --baseline reports/prev.json --new-only
     """
     if debug:
-        import logging
-
         logging.basicConfig(level=logging.DEBUG)
 
     if strict_cache and not no_network:
@@ -271,7 +279,7 @@ def scan_deps(
         )
 
     try:
-        result = asyncio.run(scan_dependency_manifest(manifest_path, allow_network=not no_network))
+        result = _run_async(scan_dependency_manifest(manifest_path, allow_network=not no_network))
         result = filter_findings(
             result,
             min_severity=min_severity.lower() if min_severity else None,
@@ -525,6 +533,7 @@ def cache_clear(targets: tuple[str, ...], clear_all: bool) -> None:
     with db() as conn:
         if "osv" in selected:
             conn.execute("DELETE FROM osv_cache")
+            clear_memory_cache()
         if "osv-vuln" in selected:
             conn.execute("DELETE FROM osv_vuln_cache")
         if "kev" in selected:
@@ -918,6 +927,14 @@ def _resolve_scan_policy(
     raise ValueError(f"Unsupported policy: {policy}")
 
 
+def _run_async(coro: Coroutine[Any, Any, T]) -> T:
+    # uvloop (the "speedups" extra) gives httpx a faster event loop when present.
+    if uvloop is not None:
+        result: T = uvloop.run(coro)
+        return result
+    return asyncio.run(coro)
+
+
 def _parse_datetime_option(value: str | None, option_name: str) -> datetime | None:
     if value is None:
         return None
@@ -935,10 +952,13 @@ def _parse_dt(s: str, *, now: datetime | None = None) -> datetime:
     if not raw:
         raise ValueError("empty datetime")
 
-    now_utc = now.astimezone(timezone.utc) if now is not None else datetime.now(timezone.utc)
-    relative = _parse_relative_datetime(raw, now_utc)
-    if relative is not None:
-        return relative
+    # Absolute timestamps are the common case; skip the relative parsing for
+    # anything shaped like YYYY-MM-DDTHH:MM:SS.
+    if not _looks_like_iso_datetime(raw):
+        now_utc = now.astimezone(timezone.utc) if now is not None else datetime.now(timezone.utc)
+        relative = _parse_relative_datetime(raw, now_utc)
+        if relative is not None:
+            return relative
 
     iso_value = raw
     if iso_value.endswith("Z"):
@@ -949,6 +969,13 @@ def _parse_dt(s: str, *, now: datetime | None = None) -> datetime:
     return dt.astimezone(timezone.utc)
 
 
+def _looks_like_iso_datetime(value: str) -> bool:
+    return len(value) >= 19 and value[4] == "-" and value[7] == "-" and value[10] in "Tt "
+
+
+_RELATIVE_DATETIME_RE = re.compile(r"^(?P<count>\d+)\s*(?P<unit>[a-zA-Z]+)$")
+
+
 def _parse_relative_datetime(value: str, now_utc: datetime) -> datetime | None:
     lowered = value.strip().lower()
     if lowered == "now":
@@ -959,7 +986,7 @@ def _parse_relative_datetime(value: str, now_utc: datetime) -> datetime | None:
     if lowered == "yesterday":
         return day_start - timedelta(days=1)
 
-    match = re.match(r"^(?P<count>\d+)\s*(?P<unit>[a-zA-Z]+)$", lowered)
+    match = _RELATIVE_DATETIME_RE.match(lowered)
     if not match:
         return None
 
@@ -1,8 +1,10 @@
 from __future__ import annotations
 
 import os
-from dataclasses import dataclass
 from datetime import timedelta
+from enum import Enum, auto
+from functools import cached_property
+from typing import Any
 
 
 def _env_int(name: str, default: int) -> int:
@@ -16,32 +18,145 @@ def _env_int(name: str, default: int) -> int:
     return value if value > 0 else default
 
 
-@dataclass(frozen=True)
+class _Unset(Enum):
+    UNSET = auto()
+
+
+_UNSET = _Unset.UNSET
+
+
 class Settings:
-    database_path: str = os.environ.get("VULNSCANNER_DB", "vulnscanner.db")
-    nvd_api_key: str | None = os.environ.get("NVD_API_KEY")
-    user_agent: str = os.environ.get(
-        "VULNSCANNER_UA",
-        "VulnScanner/0.2.0 (+https://github.com/therayyanawaz/VulnScanner)",
-    )
-    # Rate limits (NVD API: 5/30s without key, 50/30s with key)
-    nvd_max_per_30s: int = _env_int(
-        "NVD_MAX_PER_30S",
-        5 if os.environ.get("NVD_API_KEY") is None else 50,
-    )
-    # Delta sync window safeguard (smaller windows = less rate limiting issues)
-    nvd_max_days_per_request: int = _env_int("NVD_MAX_DAYS_PER_REQUEST", 3)
+    """Runtime configuration, read from the environment on first access.
+
+    Each field is resolved lazily and then cached on the instance. Keyword
+    arguments override individual fields, e.g. ``Settings(database_path="x.db")``.
+    """
+
+    def __init__(
+        self,
+        *,
+        database_path: str | None = None,
+        nvd_api_key: str | None | _Unset = _UNSET,
+        user_agent: str | None = None,
+        nvd_max_per_30s: int | None = None,
+        nvd_rate_limiter: str | None = None,
+        nvd_max_days_per_request: int | None = None,
+        osv_ttl_hours: int | None = None,
+        osv_http_timeout_seconds: int | None = None,
+        osv_http_retries: int | None = None,
+        osv_vuln_detail_concurrency: int | None = None,
+        kev_ttl_hours: int | None = None,
+        epss_ttl_hours: int | None = None,
+        sqlite_mmap_size: int | None = None,
+    ) -> None:
+        overrides = {
+            "database_path": database_path,
+            "user_agent": user_agent,
+            "nvd_max_per_30s": nvd_max_per_30s,
+            "nvd_rate_limiter": nvd_rate_limiter,
+            "nvd_max_days_per_request": nvd_max_days_per_request,
+            "osv_ttl_hours": osv_ttl_hours,
+            "osv_http_timeout_seconds": osv_http_timeout_seconds,
+            "osv_http_retries": osv_http_retries,
+            "osv_vuln_detail_concurrency": osv_vuln_detail_concurrency,
+            "kev_ttl_hours": kev_ttl_hours,
+            "epss_ttl_hours": epss_ttl_hours,
+            "sqlite_mmap_size": sqlite_mmap_size,
+        }
+        # cached_property stores values in __dict__ too, so overrides win.
+        self.__dict__.update(
+            (name, value) for name, value in overrides.items() if value is not None
+        )
+        # None is a real nvd_api_key ("no key"), so it has its own sentinel.
+        if nvd_api_key is not _UNSET:
+            self.__dict__["nvd_api_key"] = nvd_api_key
+
+    def __repr__(self) -> str:
+        fields = ", ".join(f"{name}={getattr(self, name)!r}" for name in _FIELDS)
+        return f"Settings({fields})"
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, Settings):
+            return NotImplemented
+        return self._values() == other._values()
+
+    def __hash__(self) -> int:
+        return hash(self._values())
+
+    def _values(self) -> tuple[Any, ...]:
+        return tuple(getattr(self, name) for name in _FIELDS)
+
+    def __setattr__(self, name: str, value: Any) -> None:
+        raise AttributeError(f"Settings is read-only; cannot assign {name!r}")
+
+    @cached_property
+    def database_path(self) -> str:
+        return os.environ.get("VULNSCANNER_DB", "vulnscanner.db")
+
+    @cached_property
+    def nvd_api_key(self) -> str | None:
+        return os.environ.get("NVD_API_KEY")
+
+    @cached_property
+    def user_agent(self) -> str:
+        return os.environ.get(
+            "VULNSCANNER_UA",
+            "VulnScanner/0.2.0 (+https://github.com/therayyanawaz/VulnScanner)",
+        )
+
+    @cached_property
+    def nvd_max_per_30s(self) -> int:
+        # Rate limits (NVD API: 5/30s without key, 50/30s with key)
+        return _env_int("NVD_MAX_PER_30S", 5 if self.nvd_api_key is None else 50)
+
+    @cached_property
+    def nvd_rate_limiter(self) -> str:
+        # "window" allows bursts up to the 30s quota; "paced" spaces requests evenly.
+        return os.environ.get("NVD_RATE_LIMITER", "window").strip().lower()
+
+    @cached_property
+    def nvd_max_days_per_request(self) -> int:
+        # Delta sync window safeguard (smaller windows = less rate limiting issues)
+        return _env_int("NVD_MAX_DAYS_PER_REQUEST", 3)
+
     # Cache TTLs
-    osv_ttl_hours: int = _env_int("OSV_TTL_HOURS", 12)
-    osv_http_timeout_seconds: int = _env_int("OSV_HTTP_TIMEOUT_SECONDS", 60)
-    osv_http_retries: int = _env_int("OSV_HTTP_RETRIES", 3)
-    osv_vuln_detail_concurrency: int = _env_int("OSV_VULN_DETAIL_CONCURRENCY", 20)
-    kev_ttl_hours: int = _env_int("KEV_TTL_HOURS", 24)
-    epss_ttl_hours: int = _env_int("EPSS_TTL_HOURS", 720)
-
-    @property
+    @cached_property
+    def osv_ttl_hours(self) -> int:
+        return _env_int("OSV_TTL_HOURS", 12)
+
+    @cached_property
+    def osv_http_timeout_seconds(self) -> int:
+        return _env_int("OSV_HTTP_TIMEOUT_SECONDS", 60)
+
+    @cached_property
+    def osv_http_retries(self) -> int:
+        return _env_int("OSV_HTTP_RETRIES", 3)
+
+    @cached_property
+    def osv_vuln_detail_concurrency(self) -> int:
+        return _env_int("OSV_VULN_DETAIL_CONCURRENCY", 20)
+
+    @cached_property
+    def kev_ttl_hours(self) -> int:
+        return _env_int("KEV_TTL_HOURS", 24)
+
+    @cached_property
+    def epss_ttl_hours(self) -> int:
+        return _env_int("EPSS_TTL_HOURS", 720)
+
+    @cached_property
+    def sqlite_mmap_size(self) -> int:
+        # Bytes of the database SQLite may memory-map; 0 keeps it off.
+        return _env_int("VULNSCANNER_SQLITE_MMAP_SIZE", 0)
+
+    @cached_property
     def nvd_time_window(self) -> timedelta:
         return timedelta(days=self.nvd_max_days_per_request)
 
 
+# Field names in declaration order, for __repr__ and __eq__.
+_FIELDS = tuple(
+    name for name, value in vars(Settings).items() if isinstance(value, cached_property)
+)
+
 settings = Settings()
@@ -1,16 +1,35 @@
 from __future__ import annotations
 
+import atexit
 import sqlite3
-from contextlib import contextmanager
+import threading
+from contextlib import closing, contextmanager
 from pathlib import Path
 from typing import Iterator
 
 from .config import Settings, settings
 
-SCHEMA = """
-PRAGMA journal_mode=WAL;
+# journal_mode is persisted in the database file; everything else in
+# CONNECTION_PRAGMAS only lasts for the connection that sets it. mmap_size
+# comes from settings (off by default) so memory stays bounded by cache_size.
+CONNECTION_PRAGMAS = """
 PRAGMA foreign_keys=ON;
 PRAGMA synchronous=NORMAL;
+PRAGMA temp_store=MEMORY;
+PRAGMA cache_size=-32000;
+PRAGMA wal_autocheckpoint=10000;
+"""
+
+# Large enough that every statement the package issues stays prepared for
+# the lifetime of a cached connection.
+STATEMENT_CACHE_SIZE = 256
+
+_UPSERT_META_SQL = (
+    "INSERT INTO meta(key, value) VALUES(?, ?) ON CONFLICT(key) DO UPDATE SET value=excluded.value"
+)
+
+SCHEMA = """
+PRAGMA journal_mode=WAL;
 
 CREATE TABLE IF NOT EXISTS meta (
     key TEXT PRIMARY KEY,
@@ -32,15 +51,15 @@ CREATE TABLE IF NOT EXISTS osv_cache (
     ecosystem TEXT NOT NULL,
     package TEXT NOT NULL,
     version TEXT NOT NULL,
-    fetched_at TIMESTAMP NOT NULL,
-    json BLOB NOT NULL,
+    fetched_at INTEGER NOT NULL,
+    payload BLOB NOT NULL,
     PRIMARY KEY (ecosystem, package, version)
 );
 
 CREATE TABLE IF NOT EXISTS osv_vuln_cache (
     vuln_id TEXT PRIMARY KEY,
-    fetched_at TIMESTAMP NOT NULL,
-    json BLOB NOT NULL
+    fetched_at INTEGER NOT NULL,
+    payload BLOB NOT NULL
 );
 
 CREATE TABLE IF NOT EXISTS kev (
@@ -58,44 +77,184 @@ CREATE TABLE IF NOT EXISTS epss (
 
 CREATE INDEX IF NOT EXISTS idx_cves_modified ON cves(modified);
 CREATE INDEX IF NOT EXISTS idx_cves_source ON cves(source);
+CREATE INDEX IF NOT EXISTS idx_osv_fetched ON osv_cache(fetched_at);
+CREATE INDEX IF NOT EXISTS idx_osv_vuln_fetched ON osv_vuln_cache(fetched_at);
+CREATE INDEX IF NOT EXISTS idx_kev_fetched ON kev(fetched_at);
+CREATE INDEX IF NOT EXISTS idx_epss_fetched ON epss(fetched_at);
+"""
+
+# Bump whenever SCHEMA or MIGRATIONS change; stored in PRAGMA user_version.
+SCHEMA_VERSION = 3
+
+# Runs before SCHEMA on databases older than SCHEMA_VERSION. Older OSV cache
+# tables hold ISO-string timestamps or JSON payloads; the cache is
+# disposable, so drop them and let SCHEMA recreate them for the next scan.
+MIGRATIONS = """
+DROP TABLE IF EXISTS osv_cache;
+DROP TABLE IF EXISTS osv_vuln_cache;
 """
 
 
+# Paths already brought up to SCHEMA_VERSION by this process.
+_initialized_paths: set[str] = set()
+
+
 def ensure_database(current_settings: Settings | None = None) -> None:
     if current_settings is None:
         current_settings = settings
-    Path(current_settings.database_path).parent.mkdir(parents=True, exist_ok=True)
-    with sqlite3.connect(current_settings.database_path) as conn:
-        conn.executescript(SCHEMA)
+    path = Path(current_settings.database_path)
+    # A deleted file is recreated rather than trusted to the cache.
+    if current_settings.database_path in _initialized_paths and path.exists():
+        return
+    path.parent.mkdir(parents=True, exist_ok=True)
+    # Close explicitly so the WAL is checkpointed before anyone copies the file.
+    with closing(sqlite3.connect(current_settings.database_path)) as conn:
+        _initialize(conn, current_settings)
+    _initialized_paths.add(current_settings.database_path)
+
+
+def _initialize(conn: sqlite3.Connection, current_settings: Settings) -> None:
+    conn.executescript(CONNECTION_PRAGMAS)
+    conn.execute(f"PRAGMA mmap_size={int(current_settings.sqlite_mmap_size)}")
+    if conn.execute("PRAGMA user_version").fetchone()[0] == SCHEMA_VERSION:
+        return
+    conn.executescript(MIGRATIONS)
+    conn.executescript(SCHEMA)
+    conn.execute(f"PRAGMA user_version={SCHEMA_VERSION}")
+
+
+_local = threading.local()
+_open_connections: set[sqlite3.Connection] = set()
+_open_connections_lock = threading.Lock()
+
+
+def _thread_state() -> tuple[dict[str, sqlite3.Connection], dict[str, int]]:
+    try:
+        return _local.connections, _local.depths
+    except AttributeError:
+        _local.connections = {}
+        _local.depths = {}
+        return _local.connections, _local.depths
+
+
+def _connection(current_settings: Settings) -> sqlite3.Connection:
+    connections, _ = _thread_state()
+    path = current_settings.database_path
+    conn = connections.get(path)
+    if conn is None:
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        # Autocommit mode: db() issues BEGIN/COMMIT (or savepoints) itself.
+        conn = sqlite3.connect(
+            path,
+            isolation_level=None,
+            check_same_thread=False,
+            cached_statements=STATEMENT_CACHE_SIZE,
+        )
+        # Initialise through this connection so ":memory:" databases get a schema too.
+        _initialize(conn, current_settings)
+        connections[path] = conn
+        with _open_connections_lock:
+            _open_connections.add(conn)
+    return conn
 
 
 @contextmanager
-def db(current_settings: Settings | None = None) -> Iterator[sqlite3.Connection]:
+def db(
+    current_settings: Settings | None = None, *, immediate: bool = False
+) -> Iterator[sqlite3.Connection]:
+    # Nested entries use savepoints so an inner failure only rolls back its own
+    # work. Writers should pass immediate=True so they never fail upgrading a
+    # read transaction to a write.
     if current_settings is None:
         current_settings = settings
-    ensure_database(current_settings)
-    conn = sqlite3.connect(current_settings.database_path)
+    conn = _connection(current_settings)
+    _, depths = _thread_state()
+    path = current_settings.database_path
+    depth = depths.get(path, 0)
+    savepoint = f"db_{depth}"
+    if depth == 0:
+        conn.execute("BEGIN IMMEDIATE" if immediate else "BEGIN")
+    else:
+        conn.execute(f"SAVEPOINT {savepoint}")
+    depths[path] = depth + 1
     try:
         yield conn
-        conn.commit()
+    except BaseException:
+        # SQLite already rolled back on errors such as SQLITE_FULL; rolling
+        # back again would hide the original error behind "no transaction".
+        if conn.in_transaction:
+            if depth == 0:
+                conn.execute("ROLLBACK")
+            else:
+                conn.execute(f"ROLLBACK TO {savepoint}")
+                conn.execute(f"RELEASE {savepoint}")
+        raise
+    else:
+        conn.execute("COMMIT" if depth == 0 else f"RELEASE {savepoint}")
     finally:
-        conn.close()
+        depths[path] = depth
+
+
+def close_connections() -> None:
+    connections, depths = _thread_state()
+    with _open_connections_lock:
+        for conn in connections.values():
+            _open_connections.discard(conn)
+            conn.close()
+    connections.clear()
+    depths.clear()
+
+
+def checkpoint(current_settings: Settings | None = None) -> None:
+    if current_settings is None:
+        current_settings = settings
+    _connection(current_settings).execute("PRAGMA wal_checkpoint(PASSIVE)")
+
+
+@atexit.register
+def _close_all_connections() -> None:
+    with _open_connections_lock:
+        for conn in _open_connections:
+            conn.close()
+        _open_connections.clear()
+
+
+# Committed meta values by (database path, key). Reads and writes inside an
+# open transaction bypass it, since that transaction may still roll back.
+_meta_cache: dict[tuple[str, str], str | None] = {}
+
+
+def _in_transaction(path: str) -> bool:
+    _, depths = _thread_state()
+    return depths.get(path, 0) > 0
 
 
 def get_meta(key: str) -> str | None:
+    path = settings.database_path
+    cacheable = not _in_transaction(path)
+    if cacheable and (path, key) in _meta_cache:
+        return _meta_cache[(path, key)]
     with db() as conn:
         row = conn.execute("SELECT value FROM meta WHERE key=?", (key,)).fetchone()
-        return row[0] if row else None
+    value = row[0] if row else None
+    if cacheable:
+        _meta_cache[(path, key)] = value
+    return value
 
 
 def set_meta(key: str, value: str) -> None:
-    with db() as conn:
-        conn.execute(
-            "INSERT INTO meta(key, value) VALUES(?, ?) ON CONFLICT(key) DO UPDATE SET value=excluded.value",
-            (key, value),
-        )
+    _write_meta(key, _UPSERT_META_SQL, (key, value), value)
 
 
 def delete_meta(key: str) -> None:
+    _write_meta(key, "DELETE FROM meta WHERE key=?", (key,), None)
+
+
+def _write_meta(key: str, sql: str, params: tuple[str, ...], value: str | None) -> None:
+    path = settings.database_path
+    nested = _in_transaction(path)
+    _meta_cache.pop((path, key), None)
     with db() as conn:
-        conn.execute("DELETE FROM meta WHERE key=?", (key,))
+        conn.execute(sql, params)
+    if not nested:
+        _meta_cache[(path, key)] = value
@@ -27,6 +27,7 @@ def sync_epss(force: bool = False) -> dict[str, int | bool]:
     response.raise_for_status()
     rows = list(_iter_epss_rows(response.content))
 
+    fetched_at = now.isoformat()
     with db() as conn:
         batch_size = 5000
         for start in range(0, len(rows), batch_size):
@@ -40,10 +41,7 @@ def sync_epss(force: bool = False) -> dict[str, int | bool]:
                     percentile=excluded.percentile,
                     fetched_at=excluded.fetched_at
                 """,
-                (
-                    (cve_id, score, percentile, now.isoformat())
-                    for cve_id, score, percentile in chunk
-                ),
+                ((cve_id, score, percentile, fetched_at) for cve_id, score, percentile in chunk),
             )
 
         conn.execute("UPDATE cves SET epss_score=NULL, epss_percentile=NULL")
@@ -58,7 +56,7 @@ def sync_epss(force: bool = False) -> dict[str, int | bool]:
             0
         ]
 
-    set_meta("epss_last_sync", now.isoformat())
+    set_meta("epss_last_sync", fetched_at)
     return {"skipped": False, "epss_records": len(rows), "matched_cves": int(matched)}
 
 
@@ -23,26 +23,28 @@ def sync_kev(force: bool = False) -> dict[str, int | bool]:
     entries = _extract_kev_entries(payload)
 
     cve_ids = [entry["cveID"] for entry in entries]
+    fetched_at = now.isoformat()
     with db() as conn:
-        for entry in entries:
-            cve_id = entry["cveID"]
-            conn.execute(
-                """
-                INSERT INTO kev (cve_id, json, fetched_at)
-                VALUES (?, ?, ?)
-                ON CONFLICT(cve_id) DO UPDATE SET
-                    json=excluded.json,
-                    fetched_at=excluded.fetched_at
-                """,
-                (cve_id, json.dumps(entry, separators=(",", ":")), now.isoformat()),
-            )
+        conn.executemany(
+            """
+            INSERT INTO kev (cve_id, json, fetched_at)
+            VALUES (?, ?, ?)
+            ON CONFLICT(cve_id) DO UPDATE SET
+                json=excluded.json,
+                fetched_at=excluded.fetched_at
+            """,
+            (
+                (entry["cveID"], json.dumps(entry, separators=(",", ":")), fetched_at)
+                for entry in entries
+            ),
+        )
         conn.execute("UPDATE cves SET is_known_exploited=0")
         conn.executemany(
             "UPDATE cves SET is_known_exploited=1 WHERE cve_id=?", ((cve_id,) for cve_id in cve_ids)
         )
         matched = conn.execute("SELECT COUNT(*) FROM cves WHERE is_known_exploited=1").fetchone()[0]
 
-    set_meta("kev_last_sync", now.isoformat())
+    set_meta("kev_last_sync", fetched_at)
     return {"skipped": False, "kev_records": len(entries), "matched_cves": int(matched)}
 
 
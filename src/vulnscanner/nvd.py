@@ -1,12 +1,21 @@
 from __future__ import annotations
 
 import asyncio
+import calendar
 import logging
+import re
+import sqlite3
+import time
+import weakref
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass
 from datetime import datetime, timedelta, timezone
-from typing import Any, Iterable
+from typing import Any, Awaitable, Iterable, TypeVar
 
 import httpx
+import ijson
+import orjson
 from tenacity import (
     before_sleep_log,
     retry,
@@ -16,11 +25,42 @@ from tenacity import (
 )
 
 from .config import settings
-from .db import db, get_meta, set_meta
+from .db import checkpoint, close_connections, db, get_meta, set_meta
 
 NVD_BASE = "https://services.nvd.nist.gov/rest/json/cves/2.0"
 LOGGER = logging.getLogger(__name__)
 EMPTY_SYNC_FAILURE_WINDOW_DAYS = 30
+NVD_PAGE_COUNTERS = ("totalResults", "resultsPerPage", "startIndex")
+# Windows synced at once; the shared RateLimiter still paces the requests.
+MAX_CONCURRENT_WINDOWS = 4
+# Pages of one window fetched at once, after its first page.
+MAX_CONCURRENT_PAGES = 4
+# Pages waiting for the writer. With the page and window limits above, at most
+# MAX_CONCURRENT_WINDOWS * MAX_CONCURRENT_PAGES + WRITE_QUEUE_SIZE pages are held.
+WRITE_QUEUE_SIZE = 2
+# Keep a warm connection for every page that can be in flight at once.
+NVD_HTTP_LIMITS = httpx.Limits(
+    max_connections=MAX_CONCURRENT_WINDOWS * MAX_CONCURRENT_PAGES,
+    max_keepalive_connections=MAX_CONCURRENT_WINDOWS * MAX_CONCURRENT_PAGES,
+)
+
+T = TypeVar("T")
+
+# One lock per event loop (asyncio locks cannot be shared across loops), held
+# around every SQLite write so concurrent syncs queue up instead of hitting
+# "database is locked".
+_write_locks: weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, asyncio.Lock] = (
+    weakref.WeakKeyDictionary()
+)
+
+_INSERT_CVE_SQL = """
+INSERT INTO cves (cve_id, source, json, modified)
+VALUES (?, 'NVD', ?, ?)
+ON CONFLICT(cve_id) DO UPDATE SET
+    json=excluded.json,
+    modified=excluded.modified
+WHERE coalesce(julianday(excluded.modified) >= julianday(cves.modified), 1)
+"""
 
 
 @dataclass
@@ -29,45 +69,83 @@ class NvdDeltaWindow:
     end: datetime
 
     def clamp(self, max_span: timedelta) -> list["NvdDeltaWindow"]:
-        windows: list[NvdDeltaWindow] = []
-        cur = self.start
-        while cur < self.end:
-            next_end = min(cur + max_span, self.end)
-            windows.append(NvdDeltaWindow(start=cur, end=next_end))
-            cur = next_end
-        return windows
+        # Ceiling division on timedeltas stays exact, unlike float true division.
+        count = max(0, -(-(self.end - self.start) // max_span))
+        return [
+            NvdDeltaWindow(
+                start=self.start + i * max_span,
+                end=min(self.start + (i + 1) * max_span, self.end),
+            )
+            for i in range(count)
+        ]
 
 
 class RateLimiter:
     def __init__(self, max_per_30s: int) -> None:
         self.max_per_30s = max_per_30s
-        self.calls: list[float] = []
+        self.calls: deque[float] = deque()
 
     async def wait(self) -> None:
-        import asyncio
-        import time
+        # Re-check after sleeping: concurrent waiters wake together and only
+        # the ones that still fit in the window may proceed.
+        while True:
+            now = time.monotonic()
+            window_start = now - 30.0
+            while self.calls and self.calls[0] < window_start:
+                self.calls.popleft()
+            if len(self.calls) < self.max_per_30s:
+                break
+            await asyncio.sleep(self.calls[0] + 30.0 - now)
+        self.calls.append(now)
+
+
+# Leaky bucket with no burst: one request every 30 / max_per_30s seconds.
+class PacedRateLimiter:
 
+    def __init__(self, max_per_30s: int) -> None:
+        self.max_per_30s = max_per_30s
+        self.interval = 30.0 / max_per_30s
+        self.next_slot = 0.0
+
+    async def wait(self) -> None:
+        # Claim a slot before sleeping so concurrent waiters queue up in order.
         now = time.monotonic()
-        window_start = now - 30.0
-        self.calls = [t for t in self.calls if t >= window_start]
-        if len(self.calls) >= self.max_per_30s:
-            sleep_for = self.calls[0] + 30.0 - now
-            if sleep_for > 0:
-                await asyncio.sleep(sleep_for)
-        self.calls.append(time.monotonic())
+        slot = max(now, self.next_slot)
+        self.next_slot = slot + self.interval
+        if slot > now:
+            await asyncio.sleep(slot - now)
+
+
+RATE_LIMITERS: dict[str, type[RateLimiter] | type[PacedRateLimiter]] = {
+    "window": RateLimiter,
+    "paced": PacedRateLimiter,
+}
 
 
 class NvdClient:
-    def __init__(self) -> None:
-        headers = {"User-Agent": settings.user_agent}
+    def __init__(
+        self,
+        client: httpx.AsyncClient | None = None,
+        *,
+        transport: httpx.AsyncBaseTransport | None = None,
+    ) -> None:
+        self._headers = {"User-Agent": settings.user_agent}
         self.has_api_key = bool(settings.nvd_api_key)
         if settings.nvd_api_key:
-            headers["apiKey"] = settings.nvd_api_key
-        self.client = httpx.AsyncClient(headers=headers, timeout=60)
-        self.rate_limiter = RateLimiter(settings.nvd_max_per_30s)
+            self._headers["apiKey"] = settings.nvd_api_key
+        # Headers go on each request so a caller's client can be reused as-is;
+        # a caller-supplied client also stays open after aclose(). ``transport``
+        # only applies to the client built here (tests pass httpx.MockTransport).
+        self._owns_client = client is None
+        self.client = client or httpx.AsyncClient(
+            timeout=60, limits=NVD_HTTP_LIMITS, transport=transport
+        )
+        limiter_cls = RATE_LIMITERS.get(settings.nvd_rate_limiter, RateLimiter)
+        self.rate_limiter = limiter_cls(settings.nvd_max_per_30s)
 
     async def aclose(self) -> None:
-        await self.client.aclose()
+        if self._owns_client:
+            await self.client.aclose()
 
     @retry(
         reraise=True,
@@ -86,23 +164,58 @@ class NvdClient:
             "startIndex": str(start_index),
             "resultsPerPage": "2000",
         }
-        resp = await self.client.get(NVD_BASE, params=params)
-        if resp.status_code == 404:
-            message = _extract_nvd_error_message(resp)
-            if _treat_404_as_empty_result(self.has_api_key, message):
-                # No CVEs in this time range.
-                return {"totalResults": 0, "resultsPerPage": 0, "vulnerabilities": []}
-            raise RuntimeError(_nvd_404_error_message(message))
-        elif resp.status_code == 429:
-            # Rate limited - add extra delay before raising
-            sleep_for = _retry_after_seconds(resp.headers.get("Retry-After"), default_seconds=30)
-            LOGGER.warning("Rate limited by NVD API. Waiting %s seconds before retry.", sleep_for)
-            await asyncio.sleep(sleep_for)
-        resp.raise_for_status()
-        payload = resp.json()
-        if not isinstance(payload, dict):
-            raise RuntimeError("Unexpected NVD response payload type")
-        return payload
+        async with self.client.stream(
+            "GET", NVD_BASE, params=params, headers=self._headers
+        ) as resp:
+            if resp.is_error:
+                await resp.aread()
+            if resp.status_code == 404:
+                message = _extract_nvd_error_message(resp)
+                if _treat_404_as_empty_result(self.has_api_key, message):
+                    # No CVEs in this time range.
+                    return {"totalResults": 0, "resultsPerPage": 0, "vulnerabilities": []}
+                raise RuntimeError(_nvd_404_error_message(message))
+            elif resp.status_code == 429:
+                # Rate limited - add extra delay before raising
+                sleep_for = _retry_after_seconds(
+                    resp.headers.get("Retry-After"), default_seconds=30
+                )
+                LOGGER.warning(
+                    "Rate limited by NVD API. Waiting %s seconds before retry.", sleep_for
+                )
+                await asyncio.sleep(sleep_for)
+            resp.raise_for_status()
+            return await _read_nvd_page(resp)
+
+
+async def _read_nvd_page(resp: httpx.Response) -> dict[str, Any]:
+    # One streaming pass over the top-level keys; the raw body is never held.
+    fields = ijson.sendable_list()
+    parser = ijson.kvitems_coro(fields, "", use_float=True)
+    page: dict[str, Any] = {}
+    seen_body = False
+    async for chunk in resp.aiter_bytes():
+        if not seen_body:
+            chunk = chunk.lstrip()
+            if not chunk:
+                continue
+            if not chunk.startswith(b"{"):
+                raise RuntimeError("Unexpected NVD response payload type")
+            seen_body = True
+        parser.send(chunk)
+        _keep_page_fields(fields, page)
+    parser.close()
+    _keep_page_fields(fields, page)
+    page.setdefault("vulnerabilities", [])
+    return page
+
+
+def _keep_page_fields(fields: list[tuple[str, Any]], page: dict[str, Any]) -> None:
+    # Drain as we go so unused top-level values are dropped right away.
+    for key, value in fields:
+        if key == "vulnerabilities" or key in NVD_PAGE_COUNTERS:
+            page[key] = value
+    del fields[:]
 
 
 async def sync_nvd_delta(
@@ -116,73 +229,179 @@ async def sync_nvd_delta(
         return {"cves": 0, "pages": 0}
 
     client = NvdClient()
-    saved = 0
-    pages = 0
+    queue: asyncio.Queue[Iterable[dict[str, Any]] | None] = asyncio.Queue(WRITE_QUEUE_SIZE)
+    windows = NvdDeltaWindow(last, end).clamp(settings.nvd_time_window)
+    semaphore = asyncio.Semaphore(MAX_CONCURRENT_WINDOWS)
+
+    async def sync_window(window: NvdDeltaWindow) -> int:
+        async with semaphore:
+            return await _sync_window(client, window, queue)
+
+    async def produce() -> int:
+        window_pages = await _gather_or_cancel(*(sync_window(window) for window in windows))
+        await queue.put(None)
+        return sum(window_pages)
+
     try:
-        for window in NvdDeltaWindow(last, end).clamp(settings.nvd_time_window):
-            start_index = 0
-            total_results = None
-            while True:
-                data = await client.fetch_page(window.start, window.end, start_index)
-                pages += 1
-                page_total_results = int(data.get("totalResults", 0) or 0)
-                if total_results is None:
-                    total_results = page_total_results
-                vulnerabilities: Iterable[dict[str, Any]] = data.get("vulnerabilities", [])
-                if not vulnerabilities:
-                    if _is_suspicious_empty_page(total_results, start_index):
-                        raise RuntimeError(
-                            "NVD sync returned an empty vulnerabilities page despite non-zero "
-                            "totalResults. Sync may be incomplete; retry with a shorter time window."
-                        )
-                    break
-                count = _save_vulnerabilities(vulnerabilities)
-                saved += count
-                # pagination
-                results_per_page = int(data.get("resultsPerPage", 0) or 2000)
-                if start_index + results_per_page >= total_results:
-                    break
-                start_index += results_per_page
+        pages, saved = await _gather_or_cancel(produce(), _write_pages(queue))
         if _should_fail_empty_sync(last, end, saved, pages):
             raise RuntimeError(
                 "NVD sync returned zero CVEs over a long time window. "
                 "Check API rate limiting, date parameters, and connectivity."
             )
-        _set_last_mod_time(end)
+        async with _write_lock():
+            _set_last_mod_time(end)
         return {"cves": saved, "pages": pages}
     finally:
         await client.aclose()
 
 
-def _save_vulnerabilities(vulns: Iterable[dict[str, Any]]) -> int:
-    count = 0
-    with db() as conn:
-        for item in vulns:
-            cve = item.get("cve", {})
-            cve_id = cve.get("id")
-            last_mod = cve.get("lastModified") or item.get("lastModified")
-            if not cve_id or not last_mod:
-                continue
-            # Normalize datetime string
-            modified_at = _normalize_iso8601(last_mod)
-            conn.execute(
-                """
-                INSERT INTO cves (cve_id, source, json, modified)
-                VALUES (?, 'NVD', ?, ?)
-                ON CONFLICT(cve_id) DO UPDATE SET
-                    json=excluded.json,
-                    modified=excluded.modified
-                """,
-                (cve_id, _json_dumps(item), modified_at),
+async def _sync_window(
+    client: NvdClient,
+    window: NvdDeltaWindow,
+    queue: asyncio.Queue[Iterable[dict[str, Any]] | None],
+) -> int:
+    data = await client.fetch_page(window.start, window.end, 0)
+    total_results = int(data.get("totalResults", 0) or 0)
+    if not await _queue_page(data, total_results, 0, queue):
+        return 1
+    results_per_page = int(data.get("resultsPerPage", 0) or 2000)
+    start_indexes = range(results_per_page, total_results, results_per_page)
+    semaphore = asyncio.Semaphore(MAX_CONCURRENT_PAGES)
+
+    async def fetch(start_index: int) -> None:
+        # Hold the slot until the page is queued, or a slow writer lets every
+        # page of the window pile up in memory.
+        async with semaphore:
+            page = await client.fetch_page(window.start, window.end, start_index)
+            await _queue_page(page, total_results, start_index, queue)
+
+    await _gather_or_cancel(*(fetch(start_index) for start_index in start_indexes))
+    return 1 + len(start_indexes)
+
+
+async def _queue_page(
+    data: dict[str, Any],
+    total_results: int,
+    start_index: int,
+    queue: asyncio.Queue[Iterable[dict[str, Any]] | None],
+) -> bool:
+    vulnerabilities: Iterable[dict[str, Any]] = data.get("vulnerabilities", [])
+    if not vulnerabilities:
+        if _is_suspicious_empty_page(total_results, start_index):
+            raise RuntimeError(
+                "NVD sync returned an empty vulnerabilities page despite non-zero "
+                "totalResults. Sync may be incomplete; retry with a shorter time window."
             )
-            count += 1
-    return count
+        return False
+    await queue.put(vulnerabilities)
+    return True
+
+
+async def _write_pages(queue: asyncio.Queue[Iterable[dict[str, Any]] | None]) -> int:
+    # Single consumer so SQLite only ever sees one writer. Inserts run on a
+    # dedicated thread, which keeps reusing one cached connection, so the
+    # next pages keep downloading meanwhile. Pages that queued up during the
+    # previous write are committed together, and the WAL is checkpointed
+    # once at the end instead of after every commit.
+    loop = asyncio.get_running_loop()
+    saved = 0
+    with ThreadPoolExecutor(max_workers=1, thread_name_prefix="nvd-writer") as writer:
+        try:
+            while True:
+                batch = [await queue.get()]
+                while not queue.empty():
+                    batch.append(queue.get_nowait())
+                # produce() only enqueues the None sentinel after every window finished.
+                done = batch[-1] is None
+                pages = [page for page in batch if page is not None]
+                async with _write_lock():
+                    if pages:
+                        saved += await loop.run_in_executor(writer, _save_pages, pages)
+                    # Nothing saved means nothing to fold back, and checkpoint()
+                    # would otherwise open (or create) the database for nothing.
+                    if done and saved:
+                        await loop.run_in_executor(writer, checkpoint)
+                if done:
+                    return saved
+        finally:
+            writer.submit(close_connections)
+
+
+def _write_lock() -> asyncio.Lock:
+    loop = asyncio.get_running_loop()
+    lock = _write_locks.get(loop)
+    if lock is None:
+        lock = _write_locks[loop] = asyncio.Lock()
+    return lock
+
+
+async def _gather_or_cancel(*aws: Awaitable[T]) -> list[T]:
+    # asyncio.gather leaves siblings running when one fails; cancel them.
+    tasks = [asyncio.ensure_future(aw) for aw in aws]
+    try:
+        return await asyncio.gather(*tasks)
+    except BaseException:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        raise
+
+
+def _save_pages(pages: list[Iterable[dict[str, Any]]]) -> int:
+    with db(immediate=True) as conn:
+        return sum(_save_vulnerabilities(vulns, conn) for vulns in pages)
+
+
+def _save_vulnerabilities(
+    vulns: Iterable[dict[str, Any]], conn: sqlite3.Connection | None = None
+) -> int:
+    rows = [row for item in vulns if (row := _cve_row(item)) is not None]
+    if not rows:
+        return 0
+    if conn is not None:
+        conn.executemany(_INSERT_CVE_SQL, rows)
+        return len(rows)
+    with db() as conn:
+        conn.executemany(_INSERT_CVE_SQL, rows)
+    return len(rows)
+
+
+def _cve_row(item: dict[str, Any]) -> tuple[str, bytes, str] | None:
+    try:
+        cve = item["cve"]
+        cve_id = cve["id"]
+        last_mod = cve.get("lastModified") or item.get("lastModified")
+    except (KeyError, TypeError, AttributeError):
+        return None
+    if not cve_id or not last_mod:
+        return None
+    return cve_id, _json_dumps(item), _normalize_iso8601(last_mod)
+
+
+# NVD's own lastModified shape: naive UTC with optional milliseconds. The
+# fields are range-checked so only values fromisoformat() accepts match.
+_NAIVE_NVD_TIMESTAMP_RE = re.compile(
+    r"((\d{4})-(0[1-9]|1[0-2])-(0[1-9]|[12]\d|3[01])T(?:[01]\d|2[0-3]):[0-5]\d:[0-5]\d)"
+    r"(?:\.(\d{1,6}))?"
+)
 
 
 def _normalize_iso8601(value: str) -> str:
     # Ensure Z suffix
     if value.endswith("Z"):
         return value
+    match = _NAIVE_NVD_TIMESTAMP_RE.fullmatch(value)
+    if match is not None:
+        seconds, year, month, day, fraction = match.groups()
+        # Days past the 28th and year 0 still need the calendar to be valid.
+        if year != "0000" and (
+            day <= "28" or int(day) <= calendar.monthrange(int(year), int(month))[1]
+        ):
+            # Same text the isoformat() path below produces, without a datetime.
+            if fraction and fraction.strip("0"):
+                return f"{seconds}.{fraction.ljust(6, '0')}Z"
+            return f"{seconds}Z"
     try:
         dt = datetime.fromisoformat(value)
     except Exception:
@@ -194,10 +413,8 @@ def _normalize_iso8601(value: str) -> str:
     return dt.isoformat().replace("+00:00", "Z")
 
 
-def _json_dumps(data: Any) -> str:
-    import json
-
-    return json.dumps(data, separators=(",", ":"), sort_keys=False)
+def _json_dumps(data: Any) -> bytes:
+    return orjson.dumps(data)
 
 
 def _get_last_mod_time() -> datetime | None:
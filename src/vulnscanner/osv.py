@@ -11,7 +11,7 @@ from typing import Any
 
 import httpx
 
-from .caching import cache_osv_result, cache_osv_vuln, get_cached_osv, get_cached_osv_vuln
+from .caching import cache_osv_result_many, cache_osv_vuln, get_cached_osv, get_cached_osv_vuln
 from .config import settings
 from .db import db
 
@@ -155,10 +155,12 @@ async def scan_dependency_manifest(path: str | Path, allow_network: bool = True)
         ) as client:
             for chunk in _chunked(uncached, size=200):
                 results = await _query_osv_batch(client, chunk)
+                entries = []
                 for dep, result in zip(chunk, results):
                     normalized = _normalize_query_result(result)
-                    cache_osv_result(dep.ecosystem, dep.name, dep.version, normalized)
+                    entries.append((dep.ecosystem, dep.name, dep.version, normalized))
                     cached_payloads[dep.cache_key] = normalized
+                cache_osv_result_many(entries)
 
     vuln_details = await _load_vulnerability_details(cached_payloads, allow_network=allow_network)
 
@@ -0,0 +1,57 @@
+from __future__ import annotations
+
+import shutil
+import sqlite3
+from pathlib import Path
+from typing import Iterator
+
+import pytest
+from click.testing import CliRunner
+
+import vulnscanner.db as db_module
+from vulnscanner.caching import clear_memory_cache
+from vulnscanner.config import Settings
+
+
+@pytest.fixture(scope="session")
+def _template_db(tmp_path_factory: pytest.TempPathFactory) -> Path:
+    path = tmp_path_factory.mktemp("template") / "vulnscanner.db"
+    db_module.ensure_database(Settings(database_path=str(path)))
+    return path
+
+
+@pytest.fixture
+def temp_db(_template_db: Path, tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> Iterator[Path]:
+    path = tmp_path / "vulnscanner.db"
+    shutil.copyfile(_template_db, path)
+    monkeypatch.setattr(db_module, "settings", Settings(database_path=str(path)))
+    yield path
+    db_module.close_connections()
+    clear_memory_cache()
+
+
+class _RollbackTestChanges(Exception):
+    pass
+
+
+@pytest.fixture
+def memory_db(monkeypatch: pytest.MonkeyPatch) -> Iterator[sqlite3.Connection]:
+    """Per-thread in-memory database whose changes are rolled back after each test.
+
+    The connection (and its schema) is cached by ``db()`` and reused across tests.
+    The fixture holds the outermost transaction open, so the test's own ``db()``
+    blocks become savepoints. Code that writes from other threads needs ``temp_db``.
+    """
+    monkeypatch.setattr(db_module, "settings", Settings(database_path=":memory:"))
+    try:
+        with db_module.db() as conn:
+            yield conn
+            raise _RollbackTestChanges
+    except _RollbackTestChanges:
+        pass
+    clear_memory_cache()
+
+
+@pytest.fixture(scope="session")
+def runner() -> CliRunner:
+    return CliRunner()
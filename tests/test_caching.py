@@ -0,0 +1,109 @@
+from __future__ import annotations
+
+import sqlite3
+
+import msgpack
+
+import vulnscanner.caching as caching
+import vulnscanner.db as db_module
+from vulnscanner.caching import (
+    cache_osv_result,
+    cache_osv_result_many,
+    clear_memory_cache,
+    get_cached_osv,
+    json_dumps,
+    json_loads,
+)
+from vulnscanner.config import Settings
+from vulnscanner.db import db, ensure_database
+
+
+def test_json_dumps_is_compact_and_sorted() -> None:
+    assert json_dumps({"b": 1, "a": [1, 2]}) == b'{"a":[1,2],"b":1}'
+
+
+def test_json_loads_accepts_text_and_bytes() -> None:
+    assert json_loads('{"a":1}') == {"a": 1}
+    assert json_loads(b'{"a":1}') == {"a": 1}
+
+
+def test_cache_osv_result_roundtrip(memory_db) -> None:
+    payload = {"vulns": [{"id": "GHSA-xxxx", "aliases": ["CVE-2024-0001"]}]}
+    cache_osv_result("npm", "demo", "1.0.0", payload)
+    assert get_cached_osv("npm", "demo", "1.0.0") == payload
+    assert get_cached_osv("npm", "demo", "2.0.0") is None
+
+
+def test_cache_osv_result_many_stores_every_entry(memory_db) -> None:
+    cache_osv_result_many(
+        [("npm", "a", "1.0.0", {"vulns": []}), ("PyPI", "b", "2.0", {"vulns": [{"id": "X"}]})]
+    )
+    assert get_cached_osv("npm", "a", "1.0.0") == {"vulns": []}
+    assert get_cached_osv("PyPI", "b", "2.0") == {"vulns": [{"id": "X"}]}
+
+
+def test_get_cached_osv_ignores_expired_rows(memory_db) -> None:
+    cache_osv_result("npm", "demo", "1.0.0", {"vulns": []})
+    with db() as conn:
+        conn.execute("UPDATE osv_cache SET fetched_at = fetched_at - ?", (13 * 3600,))
+    assert get_cached_osv("npm", "demo", "1.0.0") is None
+
+
+def test_get_cached_osv_serves_repeat_lookups_from_memory(memory_db) -> None:
+    cache_osv_result("npm", "demo", "1.0.0", {"vulns": []})
+    first = get_cached_osv("npm", "demo", "1.0.0")
+    memory_db.execute("DELETE FROM osv_cache")
+    assert get_cached_osv("npm", "demo", "1.0.0") is first
+    clear_memory_cache()
+    assert get_cached_osv("npm", "demo", "1.0.0") is None
+
+
+def test_cache_osv_result_replaces_memory_entry(memory_db) -> None:
+    cache_osv_result("npm", "demo", "1.0.0", {"vulns": []})
+    assert get_cached_osv("npm", "demo", "1.0.0") == {"vulns": []}
+    cache_osv_result("npm", "demo", "1.0.0", {"vulns": [{"id": "GHSA-xxxx"}]})
+    assert get_cached_osv("npm", "demo", "1.0.0") == {"vulns": [{"id": "GHSA-xxxx"}]}
+    assert memory_db.execute("SELECT COUNT(*) FROM osv_cache").fetchone()[0] == 1
+
+
+def test_memory_cache_is_scoped_to_the_database(temp_db, tmp_path, monkeypatch) -> None:
+    cache_osv_result("npm", "demo", "1.0.0", {"vulns": []})
+    assert get_cached_osv("npm", "demo", "1.0.0") == {"vulns": []}
+    other = Settings(database_path=str(tmp_path / "other.db"))
+    ensure_database(other)
+    monkeypatch.setattr(db_module, "settings", other)
+    assert get_cached_osv("npm", "demo", "1.0.0") is None
+
+
+def test_memory_entry_expires_with_row_ttl(memory_db, monkeypatch) -> None:
+    now = 1_722_470_400.0
+    monkeypatch.setattr(caching, "_now", lambda: now)
+    cache_osv_result("npm", "demo", "1.0.0", {"vulns": []})
+    assert get_cached_osv("npm", "demo", "1.0.0") == {"vulns": []}
+    monkeypatch.setattr(caching, "_now", lambda: now + 13 * 3600)
+    assert get_cached_osv("npm", "demo", "1.0.0") is None
+
+
+def test_osv_cache_stores_msgpack_payload(memory_db) -> None:
+    payload = {"vulns": [{"id": "GHSA-xxxx", "severity": 9.8}]}
+    cache_osv_result("npm", "demo", "1.0.0", payload)
+    (blob,) = memory_db.execute("SELECT payload FROM osv_cache").fetchone()
+    assert msgpack.unpackb(blob, raw=False) == payload
+
+
+def test_ensure_database_drops_legacy_osv_cache(temp_db) -> None:
+    with sqlite3.connect(temp_db) as conn:
+        conn.execute("DROP TABLE osv_cache")
+        conn.execute(
+            "CREATE TABLE osv_cache (ecosystem TEXT, package TEXT, version TEXT,"
+            " fetched_at TIMESTAMP, json TEXT, PRIMARY KEY (ecosystem, package, version))"
+        )
+        conn.execute(
+            "INSERT INTO osv_cache VALUES ('npm', 'demo', '1.0.0', '2024-08-01T00:00:00+00:00', '{}')"
+        )
+        conn.execute("PRAGMA user_version=2")
+    ensure_database()
+    with sqlite3.connect(temp_db) as conn:
+        columns = [row[1] for row in conn.execute("PRAGMA table_info(osv_cache)")]
+        assert "payload" in columns
+        assert conn.execute("SELECT COUNT(*) FROM osv_cache").fetchone()[0] == 0
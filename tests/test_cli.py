@@ -1,9 +1,11 @@
 from __future__ import annotations
 
+import asyncio
 import json
 from contextlib import contextmanager
 from datetime import datetime, timezone
 from pathlib import Path
+from types import SimpleNamespace
 
 import pytest
 from click.testing import CliRunner
@@ -18,56 +20,49 @@ from vulnscanner.cli import (
 )
 from vulnscanner.osv import ScanFinding, ScanResult
 
-
-def test_parse_dt_accepts_zulu_time() -> None:
-    parsed = _parse_dt("2024-08-01T00:00:00Z")
-    assert parsed == datetime(2024, 8, 1, 0, 0, 0, tzinfo=timezone.utc)
-
-
-def test_parse_dt_normalizes_offset_time() -> None:
-    parsed = _parse_dt("2024-08-01T05:30:00+05:30")
-    assert parsed == datetime(2024, 8, 1, 0, 0, 0, tzinfo=timezone.utc)
-
-
-def test_parse_dt_requires_timezone() -> None:
-    with pytest.raises(ValueError):
-        _parse_dt("2024-08-01T00:00:00")
+NOW = datetime(2026, 3, 3, 12, 34, 56, tzinfo=timezone.utc)
+
+
+@pytest.mark.parametrize(
+    ("value", "expected"),
+    [
+        ("2024-08-01T00:00:00Z", datetime(2024, 8, 1, tzinfo=timezone.utc)),
+        ("2024-08-01T05:30:00+05:30", datetime(2024, 8, 1, tzinfo=timezone.utc)),
+        ("2024-08-01 00:00:00.250Z", datetime(2024, 8, 1, 0, 0, 0, 250000, tzinfo=timezone.utc)),
+        ("  2024-08-01T00:00:00Z  ", datetime(2024, 8, 1, tzinfo=timezone.utc)),
+        ("now", NOW),
+        ("7d", datetime(2026, 2, 24, 12, 34, 56, tzinfo=timezone.utc)),
+        ("12 hours", datetime(2026, 3, 3, 0, 34, 56, tzinfo=timezone.utc)),
+        ("today", datetime(2026, 3, 3, tzinfo=timezone.utc)),
+        ("yesterday", datetime(2026, 3, 2, tzinfo=timezone.utc)),
+    ],
+)
+def test_parse_dt_accepts(value: str, expected: datetime) -> None:
+    assert _parse_dt(value, now=NOW) == expected
 
 
-def test_parse_dt_rejects_empty_value() -> None:
+@pytest.mark.parametrize("value", ["2024-08-01T00:00:00", "   ", "xyz", "7 fortnights"])
+def test_parse_dt_rejects(value: str) -> None:
     with pytest.raises(ValueError):
-        _parse_dt("   ")
-
+        _parse_dt(value, now=NOW)
 
-def test_parse_dt_accepts_now_keyword() -> None:
-    now = datetime(2026, 3, 3, 12, 0, 0, tzinfo=timezone.utc)
-    parsed = _parse_dt("now", now=now)
-    assert parsed == now
 
+def test_run_async_prefers_uvloop_when_installed(monkeypatch: pytest.MonkeyPatch) -> None:
+    async def _answer() -> int:
+        return 42
 
-def test_parse_dt_accepts_relative_days() -> None:
-    now = datetime(2026, 3, 3, 12, 0, 0, tzinfo=timezone.utc)
-    parsed = _parse_dt("7d", now=now)
-    assert parsed == datetime(2026, 2, 24, 12, 0, 0, tzinfo=timezone.utc)
+    monkeypatch.setattr(cli, "uvloop", None)
+    assert cli._run_async(_answer()) == 42
 
+    calls = []
 
-def test_parse_dt_accepts_relative_hours_with_word_unit() -> None:
-    now = datetime(2026, 3, 3, 12, 0, 0, tzinfo=timezone.utc)
-    parsed = _parse_dt("12 hours", now=now)
-    assert parsed == datetime(2026, 3, 3, 0, 0, 0, tzinfo=timezone.utc)
+    def _fake_uvloop_run(coro):
+        calls.append(coro)
+        return asyncio.run(coro)
 
-
-def test_parse_dt_accepts_today_and_yesterday() -> None:
-    now = datetime(2026, 3, 3, 12, 34, 56, tzinfo=timezone.utc)
-    today = _parse_dt("today", now=now)
-    yesterday = _parse_dt("yesterday", now=now)
-    assert today == datetime(2026, 3, 3, 0, 0, 0, tzinfo=timezone.utc)
-    assert yesterday == datetime(2026, 3, 2, 0, 0, 0, tzinfo=timezone.utc)
-
-
-def test_parse_dt_rejects_unknown_relative_value() -> None:
-    with pytest.raises(ValueError):
-        _parse_dt("xyz")
+    monkeypatch.setattr(cli, "uvloop", SimpleNamespace(run=_fake_uvloop_run))
+    assert cli._run_async(_answer()) == 42
+    assert len(calls) == 1
 
 
 def test_resolve_scan_policy_none_keeps_inputs() -> None:
@@ -121,8 +116,7 @@ def test_render_scan_result_csv_markdown_and_sarif() -> None:
     assert run["results"][0]["level"] == "error"
 
 
-def test_scan_deps_help_includes_no_network_option() -> None:
-    runner = CliRunner()
+def test_scan_deps_help_includes_no_network_option(runner: CliRunner) -> None:
     result = runner.invoke(main, ["scan-deps", "--help"])
     assert result.exit_code == 0
     assert "--no-network" in result.output
@@ -136,16 +130,14 @@ def test_scan_deps_help_includes_no_network_option() -> None:
     assert "--fail-on-new-only" in result.output
 
 
-def test_root_help_supports_short_h() -> None:
-    runner = CliRunner()
+def test_root_help_supports_short_h(runner: CliRunner) -> None:
     result = runner.invoke(main, ["-h"])
     assert result.exit_code == 0
     assert "Core workflow:" in result.output
     assert "scan-deps" in result.output
 
 
-def test_scan_deps_help_supports_short_h() -> None:
-    runner = CliRunner()
+def test_scan_deps_help_supports_short_h(runner: CliRunner) -> None:
     result = runner.invoke(main, ["scan-deps", "-h"])
     assert result.exit_code == 0
     assert "Scan a dependency manifest" in result.output
@@ -162,7 +154,7 @@ def test_man_page_exists_with_expected_sections() -> None:
 
 
 def test_scan_deps_no_network_warns_on_cache_miss(
-    tmp_path, monkeypatch: pytest.MonkeyPatch
+    tmp_path, monkeypatch: pytest.MonkeyPatch, runner: CliRunner
 ) -> None:
     manifest = tmp_path / "requirements.txt"
     manifest.write_text("flask==3.0.3\n", encoding="utf-8")
@@ -173,24 +165,22 @@ def test_scan_deps_no_network_warns_on_cache_miss(
         return ScanResult(dependencies_total=1, cache_hits=0, cache_misses=1, findings=())
 
     monkeypatch.setattr(cli, "scan_dependency_manifest", _fake_scan)
-    runner = CliRunner()
     result = runner.invoke(main, ["scan-deps", str(manifest), "--no-network"])
     assert result.exit_code == 0
     assert "Cache-only mode skipped live OSV lookups for 1 dependencies" in result.output
 
 
-def test_scan_deps_strict_cache_requires_no_network(tmp_path) -> None:
+def test_scan_deps_strict_cache_requires_no_network(tmp_path, runner: CliRunner) -> None:
     manifest = tmp_path / "requirements.txt"
     manifest.write_text("flask==3.0.3\n", encoding="utf-8")
 
-    runner = CliRunner()
     result = runner.invoke(main, ["scan-deps", str(manifest), "--strict-cache"])
     assert result.exit_code != 0
     assert "--strict-cache requires --no-network" in result.output
 
 
 def test_scan_deps_strict_cache_fails_on_cache_miss(
-    tmp_path, monkeypatch: pytest.MonkeyPatch
+    tmp_path, monkeypatch: pytest.MonkeyPatch, runner: CliRunner
 ) -> None:
     manifest = tmp_path / "requirements.txt"
     manifest.write_text("flask==3.0.3\n", encoding="utf-8")
@@ -201,14 +191,13 @@ def test_scan_deps_strict_cache_fails_on_cache_miss(
         return ScanResult(dependencies_total=1, cache_hits=0, cache_misses=2, findings=())
 
     monkeypatch.setattr(cli, "scan_dependency_manifest", _fake_scan)
-    runner = CliRunner()
     result = runner.invoke(main, ["scan-deps", str(manifest), "--no-network", "--strict-cache"])
     assert result.exit_code == cli.EXIT_STRICT_CACHE_MISS
     assert "Policy failed: cache_miss=2" in result.output
 
 
 def test_scan_deps_policy_failure_uses_policy_exit_code(
-    tmp_path, monkeypatch: pytest.MonkeyPatch
+    tmp_path, monkeypatch: pytest.MonkeyPatch, runner: CliRunner
 ) -> None:
     manifest = tmp_path / "requirements.txt"
     manifest.write_text("flask==3.0.3\n", encoding="utf-8")
@@ -234,7 +223,6 @@ def test_scan_deps_policy_failure_uses_policy_exit_code(
         )
 
     monkeypatch.setattr(cli, "scan_dependency_manifest", _fake_scan)
-    runner = CliRunner()
     result = runner.invoke(main, ["scan-deps", str(manifest), "--fail-on", "high"])
     assert result.exit_code == cli.EXIT_POLICY_FAILED
     assert "Policy failed: severity>=high" in result.output
@@ -243,6 +231,7 @@ def test_scan_deps_policy_failure_uses_policy_exit_code(
 def test_scan_deps_runtime_failure_uses_scan_failed_exit_code(
     tmp_path,
     monkeypatch: pytest.MonkeyPatch,
+    runner: CliRunner,
 ) -> None:
     manifest = tmp_path / "requirements.txt"
     manifest.write_text("flask==3.0.3\n", encoding="utf-8")
@@ -252,27 +241,24 @@ def test_scan_deps_runtime_failure_uses_scan_failed_exit_code(
         raise RuntimeError("upstream unavailable")
 
     monkeypatch.setattr(cli, "scan_dependency_manifest", _boom)
-    runner = CliRunner()
     result = runner.invoke(main, ["scan-deps", str(manifest)])
     assert result.exit_code == cli.EXIT_SCAN_FAILED
     assert "Dependency scan failed: upstream unavailable" in result.output
 
 
-def test_scan_deps_new_only_requires_baseline(tmp_path) -> None:
+def test_scan_deps_new_only_requires_baseline(tmp_path, runner: CliRunner) -> None:
     manifest = tmp_path / "requirements.txt"
     manifest.write_text("flask==3.0.3\n", encoding="utf-8")
 
-    runner = CliRunner()
     result = runner.invoke(main, ["scan-deps", str(manifest), "--new-only"])
     assert result.exit_code != 0
     assert "--new-only requires --baseline" in result.output
 
 
-def test_scan_deps_fail_on_new_only_requires_baseline(tmp_path) -> None:
+def test_scan_deps_fail_on_new_only_requires_baseline(tmp_path, runner: CliRunner) -> None:
     manifest = tmp_path / "requirements.txt"
     manifest.write_text("flask==3.0.3\n", encoding="utf-8")
 
-    runner = CliRunner()
     result = runner.invoke(main, ["scan-deps", str(manifest), "--fail-on-new-only"])
     assert result.exit_code != 0
     assert "--fail-on-new-only requires --baseline" in result.output
@@ -329,7 +315,9 @@ def test_select_output_findings_supports_sort_and_limits() -> None:
     assert top_zero == ()
 
 
-def test_scan_deps_top_limits_table_rows(tmp_path, monkeypatch: pytest.MonkeyPatch) -> None:
+def test_scan_deps_top_limits_table_rows(
+    tmp_path, monkeypatch: pytest.MonkeyPatch, runner: CliRunner
+) -> None:
     manifest = tmp_path / "requirements.txt"
     manifest.write_text("flask==3.0.3\n", encoding="utf-8")
 
@@ -363,7 +351,6 @@ def test_scan_deps_top_limits_table_rows(tmp_path, monkeypatch: pytest.MonkeyPat
         )
 
     monkeypatch.setattr(cli, "scan_dependency_manifest", _fake_scan)
-    runner = CliRunner()
     result = runner.invoke(main, ["scan-deps", str(manifest), "--format", "table", "--top", "1"])
     assert result.exit_code == 0
     assert "OSV-CRIT" in result.output
@@ -372,7 +359,7 @@ def test_scan_deps_top_limits_table_rows(tmp_path, monkeypatch: pytest.MonkeyPat
 
 
 def test_scan_deps_baseline_new_only_filters_results(
-    tmp_path, monkeypatch: pytest.MonkeyPatch
+    tmp_path, monkeypatch: pytest.MonkeyPatch, runner: CliRunner
 ) -> None:
     manifest = tmp_path / "requirements.txt"
     manifest.write_text("flask==3.0.3\n", encoding="utf-8")
@@ -422,7 +409,6 @@ def test_scan_deps_baseline_new_only_filters_results(
         )
 
     monkeypatch.setattr(cli, "scan_dependency_manifest", _fake_scan)
-    runner = CliRunner()
     result = runner.invoke(
         main,
         [
@@ -444,6 +430,7 @@ def test_scan_deps_baseline_new_only_filters_results(
 def test_scan_deps_baseline_uses_ecosystem_when_available(
     tmp_path,
     monkeypatch: pytest.MonkeyPatch,
+    runner: CliRunner,
 ) -> None:
     manifest = tmp_path / "requirements.txt"
     manifest.write_text("flask==3.0.3\n", encoding="utf-8")
@@ -485,7 +472,6 @@ def test_scan_deps_baseline_uses_ecosystem_when_available(
         )
 
     monkeypatch.setattr(cli, "scan_dependency_manifest", _fake_scan)
-    runner = CliRunner()
     result = runner.invoke(
         main,
         [
@@ -506,6 +492,7 @@ def test_scan_deps_baseline_uses_ecosystem_when_available(
 def test_scan_deps_invalid_baseline_uses_scan_failed_exit_code(
     tmp_path,
     monkeypatch: pytest.MonkeyPatch,
+    runner: CliRunner,
 ) -> None:
     manifest = tmp_path / "requirements.txt"
     manifest.write_text("flask==3.0.3\n", encoding="utf-8")
@@ -517,13 +504,14 @@ def test_scan_deps_invalid_baseline_uses_scan_failed_exit_code(
         return ScanResult(dependencies_total=0, cache_hits=0, cache_misses=0, findings=())
 
     monkeypatch.setattr(cli, "scan_dependency_manifest", _fake_scan)
-    runner = CliRunner()
     result = runner.invoke(main, ["scan-deps", str(manifest), "--baseline", str(baseline)])
     assert result.exit_code == cli.EXIT_SCAN_FAILED
     assert "Invalid baseline file:" in result.output
 
 
-def test_scan_deps_save_baseline_writes_json(tmp_path, monkeypatch: pytest.MonkeyPatch) -> None:
+def test_scan_deps_save_baseline_writes_json(
+    tmp_path, monkeypatch: pytest.MonkeyPatch, runner: CliRunner
+) -> None:
     manifest = tmp_path / "requirements.txt"
     manifest.write_text("flask==3.0.3\n", encoding="utf-8")
     baseline_out = tmp_path / "out" / "baseline.json"
@@ -549,7 +537,6 @@ def test_scan_deps_save_baseline_writes_json(tmp_path, monkeypatch: pytest.Monke
         )
 
     monkeypatch.setattr(cli, "scan_dependency_manifest", _fake_scan)
-    runner = CliRunner()
     result = runner.invoke(main, ["scan-deps", str(manifest), "--save-baseline", str(baseline_out)])
     assert result.exit_code == 0
     assert "Baseline saved to" in result.output
@@ -562,6 +549,7 @@ def test_scan_deps_save_baseline_writes_json(tmp_path, monkeypatch: pytest.Monke
 def test_scan_deps_fail_on_new_only_uses_diff_for_policy(
     tmp_path,
     monkeypatch: pytest.MonkeyPatch,
+    runner: CliRunner,
 ) -> None:
     manifest = tmp_path / "requirements.txt"
     manifest.write_text("flask==3.0.3\n", encoding="utf-8")
@@ -603,7 +591,6 @@ def test_scan_deps_fail_on_new_only_uses_diff_for_policy(
         )
 
     monkeypatch.setattr(cli, "scan_dependency_manifest", _fake_scan)
-    runner = CliRunner()
     result = runner.invoke(
         main,
         [
@@ -620,7 +607,7 @@ def test_scan_deps_fail_on_new_only_uses_diff_for_policy(
     assert "Baseline comparison: 0 new / 1 current findings" in result.output
 
 
-def test_state_show_json_output(monkeypatch: pytest.MonkeyPatch) -> None:
+def test_state_show_json_output(monkeypatch: pytest.MonkeyPatch, runner: CliRunner) -> None:
     values = {
         "nvd_last_mod": "2026-03-03T00:00:00+00:00",
         "kev_last_sync": None,
@@ -628,7 +615,6 @@ def test_state_show_json_output(monkeypatch: pytest.MonkeyPatch) -> None:
     }
     monkeypatch.setattr(cli, "ensure_database", lambda: None)
     monkeypatch.setattr(cli, "get_meta", lambda key: values[key])
-    runner = CliRunner()
     result = runner.invoke(main, ["state", "show", "--format", "json"])
     assert result.exit_code == 0
     data = json.loads(result.output)
@@ -637,47 +623,47 @@ def test_state_show_json_output(monkeypatch: pytest.MonkeyPatch) -> None:
     assert data["epss_last_sync"] == "2026-03-02T00:00:00+00:00"
 
 
-def test_state_reset_all_keys(monkeypatch: pytest.MonkeyPatch) -> None:
+def test_state_reset_all_keys(monkeypatch: pytest.MonkeyPatch, runner: CliRunner) -> None:
     deleted: list[str] = []
     monkeypatch.setattr(cli, "ensure_database", lambda: None)
     monkeypatch.setattr(cli, "delete_meta", lambda key: deleted.append(key))
-    runner = CliRunner()
     result = runner.invoke(main, ["state", "reset"])
     assert result.exit_code == 0
     assert deleted == ["nvd_last_mod", "kev_last_sync", "epss_last_sync"]
     assert "Reset state keys: nvd_last_mod, kev_last_sync, epss_last_sync" in result.output
 
 
-def test_state_reset_selected_key(monkeypatch: pytest.MonkeyPatch) -> None:
+def test_state_reset_selected_key(monkeypatch: pytest.MonkeyPatch, runner: CliRunner) -> None:
     deleted: list[str] = []
     monkeypatch.setattr(cli, "ensure_database", lambda: None)
     monkeypatch.setattr(cli, "delete_meta", lambda key: deleted.append(key))
-    runner = CliRunner()
     result = runner.invoke(main, ["state", "reset", "--key", "kev_last_sync"])
     assert result.exit_code == 0
     assert deleted == ["kev_last_sync"]
 
 
-def test_kev_sync_failure_uses_sync_exit_code(monkeypatch: pytest.MonkeyPatch) -> None:
+def test_kev_sync_failure_uses_sync_exit_code(
+    monkeypatch: pytest.MonkeyPatch, runner: CliRunner
+) -> None:
     def _broken_sync(force: bool = False):
         _ = force
         raise RuntimeError("feed down")
 
     monkeypatch.setattr(cli, "ensure_database", lambda: None)
     monkeypatch.setattr(cli, "sync_kev", _broken_sync)
-    runner = CliRunner()
     result = runner.invoke(main, ["kev-sync"])
     assert result.exit_code == cli.EXIT_SYNC_FAILED
     assert "KEV sync failed: feed down" in result.output
 
 
-def test_nvd_sync_shows_zero_result_recovery_guidance(monkeypatch: pytest.MonkeyPatch) -> None:
+def test_nvd_sync_shows_zero_result_recovery_guidance(
+    monkeypatch: pytest.MonkeyPatch, runner: CliRunner
+) -> None:
     async def _broken_sync(*_args, **_kwargs):
         raise RuntimeError("NVD sync returned zero CVEs over a long time window.")
 
     monkeypatch.setattr(cli, "ensure_database", lambda: None)
     monkeypatch.setattr(cli, "sync_nvd_delta", _broken_sync)
-    runner = CliRunner()
     result = runner.invoke(main, ["nvd-sync", "--since", "90d"])
     assert result.exit_code == cli.EXIT_SYNC_FAILED
     assert "NVD returned 0 CVEs for a long sync window" in result.output
@@ -687,13 +673,14 @@ def test_nvd_sync_shows_zero_result_recovery_guidance(monkeypatch: pytest.Monkey
     assert "Sync failed: NVD sync returned zero CVEs over a long time window." in result.output
 
 
-def test_nvd_sync_shows_api_key_404_guidance(monkeypatch: pytest.MonkeyPatch) -> None:
+def test_nvd_sync_shows_api_key_404_guidance(
+    monkeypatch: pytest.MonkeyPatch, runner: CliRunner
+) -> None:
     async def _broken_sync(*_args, **_kwargs):
         raise RuntimeError("NVD returned HTTP 404 while using an API key.")
 
     monkeypatch.setattr(cli, "ensure_database", lambda: None)
     monkeypatch.setattr(cli, "sync_nvd_delta", _broken_sync)
-    runner = CliRunner()
     result = runner.invoke(main, ["nvd-sync", "--since", "7d"])
     assert result.exit_code == cli.EXIT_SYNC_FAILED
     assert "NVD API key appears invalid, blocked, or revoked" in result.output
@@ -701,7 +688,7 @@ def test_nvd_sync_shows_api_key_404_guidance(monkeypatch: pytest.MonkeyPatch) ->
     assert "vulnscanner nvd-sync --since 7d --until now" in result.output
 
 
-def test_cache_stats_json_output(monkeypatch: pytest.MonkeyPatch) -> None:
+def test_cache_stats_json_output(monkeypatch: pytest.MonkeyPatch, runner: CliRunner) -> None:
     counts = {
         "cves": 10,
         "osv_cache": 3,
@@ -728,14 +715,15 @@ def test_cache_stats_json_output(monkeypatch: pytest.MonkeyPatch) -> None:
 
     monkeypatch.setattr(cli, "ensure_database", lambda: None)
     monkeypatch.setattr(cli, "db", _fake_db)
-    runner = CliRunner()
     result = runner.invoke(main, ["cache", "stats", "--format", "json"])
     assert result.exit_code == 0
     payload = json.loads(result.output)
     assert payload == counts
 
 
-def test_cache_clear_defaults_to_osv_tables(monkeypatch: pytest.MonkeyPatch) -> None:
+def test_cache_clear_defaults_to_osv_tables(
+    monkeypatch: pytest.MonkeyPatch, runner: CliRunner
+) -> None:
     executed: list[str] = []
     deleted_meta: list[str] = []
 
@@ -751,14 +739,15 @@ def test_cache_clear_defaults_to_osv_tables(monkeypatch: pytest.MonkeyPatch) ->
     monkeypatch.setattr(cli, "ensure_database", lambda: None)
     monkeypatch.setattr(cli, "db", _fake_db)
     monkeypatch.setattr(cli, "delete_meta", lambda key: deleted_meta.append(key))
-    runner = CliRunner()
     result = runner.invoke(main, ["cache", "clear"])
     assert result.exit_code == 0
     assert executed == ["DELETE FROM osv_cache", "DELETE FROM osv_vuln_cache"]
     assert deleted_meta == []
 
 
-def test_cache_clear_all_resets_enrichment_and_meta(monkeypatch: pytest.MonkeyPatch) -> None:
+def test_cache_clear_all_resets_enrichment_and_meta(
+    monkeypatch: pytest.MonkeyPatch, runner: CliRunner
+) -> None:
     executed: list[str] = []
     deleted_meta: list[str] = []
 
@@ -774,7 +763,6 @@ def test_cache_clear_all_resets_enrichment_and_meta(monkeypatch: pytest.MonkeyPa
     monkeypatch.setattr(cli, "ensure_database", lambda: None)
     monkeypatch.setattr(cli, "db", _fake_db)
     monkeypatch.setattr(cli, "delete_meta", lambda key: deleted_meta.append(key))
-    runner = CliRunner()
     result = runner.invoke(main, ["cache", "clear", "--all"])
     assert result.exit_code == 0
     assert "DELETE FROM osv_cache" in executed
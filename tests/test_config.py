@@ -0,0 +1,41 @@
+from __future__ import annotations
+
+import pytest
+
+from vulnscanner.config import Settings
+
+
+def test_settings_read_environment_on_first_access(monkeypatch: pytest.MonkeyPatch) -> None:
+    current = Settings()
+    monkeypatch.setenv("OSV_TTL_HOURS", "6")
+    monkeypatch.setenv("NVD_API_KEY", "secret")
+    monkeypatch.delenv("NVD_MAX_PER_30S", raising=False)
+    assert current.osv_ttl_hours == 6
+    assert current.nvd_max_per_30s == 50
+    monkeypatch.setenv("OSV_TTL_HOURS", "24")
+    assert current.osv_ttl_hours == 6
+
+
+def test_settings_overrides_and_read_only() -> None:
+    current = Settings(database_path="custom.db", nvd_max_days_per_request=7)
+    assert current.database_path == "custom.db"
+    assert current.nvd_time_window.days == 7
+    with pytest.raises(AttributeError):
+        current.database_path = "other.db"  # type: ignore[misc]
+    with pytest.raises(TypeError):
+        Settings(unknown_field=1)
+
+
+def test_settings_nvd_api_key_none_overrides_environment(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setenv("NVD_API_KEY", "secret")
+    monkeypatch.delenv("NVD_MAX_PER_30S", raising=False)
+    assert Settings().nvd_api_key == "secret"
+    current = Settings(nvd_api_key=None)
+    assert current.nvd_api_key is None
+    assert current.nvd_max_per_30s == 5
+
+
+def test_settings_compare_and_repr_by_value() -> None:
+    assert Settings(database_path="a.db") == Settings(database_path="a.db")
+    assert Settings(database_path="a.db") != Settings(database_path="b.db")
+    assert "database_path='a.db'" in repr(Settings(database_path="a.db"))
@@ -0,0 +1,137 @@
+from __future__ import annotations
+
+import sqlite3
+
+import pytest
+
+from vulnscanner.config import Settings
+from vulnscanner.db import (
+    SCHEMA_VERSION,
+    close_connections,
+    db,
+    delete_meta,
+    ensure_database,
+    get_meta,
+    set_meta,
+)
+
+
+def test_db_reuses_connection_per_thread(memory_db) -> None:
+    with db() as first:
+        pass
+    with db() as second:
+        pass
+    assert first is second
+
+
+def test_db_rolls_back_on_error(memory_db) -> None:
+    set_meta("k", "before")
+    with pytest.raises(RuntimeError):
+        with db() as conn:
+            conn.execute("UPDATE meta SET value='after' WHERE key='k'")
+            raise RuntimeError("boom")
+    assert get_meta("k") == "before"
+
+
+def test_nested_db_failure_only_rolls_back_inner_block(memory_db) -> None:
+    with db() as conn:
+        conn.execute("INSERT INTO meta(key, value) VALUES ('outer', '1')")
+        with pytest.raises(RuntimeError):
+            with db() as inner:
+                inner.execute("INSERT INTO meta(key, value) VALUES ('inner', '1')")
+                raise RuntimeError("boom")
+    assert get_meta("outer") == "1"
+    assert get_meta("inner") is None
+
+
+def test_db_surfaces_disk_full_after_sqlite_rolled_back(temp_db) -> None:
+    # SQLITE_FULL ends the transaction on SQLite's side; the caller must still
+    # see the disk-full error, not a failed ROLLBACK.
+    with pytest.raises(sqlite3.OperationalError, match="database or disk is full"):
+        with db() as conn:
+            page_count = conn.execute("PRAGMA page_count").fetchone()[0]
+            conn.execute(f"PRAGMA max_page_count={page_count}")
+            with db() as inner:
+                inner.execute("INSERT INTO meta(key, value) VALUES ('big', ?)", ("x" * 200_000,))
+    assert get_meta("big") is None
+
+
+def test_memory_db_isolates_tests_first(memory_db) -> None:
+    assert get_meta("isolation") is None
+    set_meta("isolation", "written")
+
+
+def test_memory_db_isolates_tests_second(memory_db) -> None:
+    assert get_meta("isolation") is None
+    set_meta("isolation", "written")
+
+
+def test_ensure_database_records_schema_version(temp_db) -> None:
+    with sqlite3.connect(temp_db) as conn:
+        assert conn.execute("PRAGMA user_version").fetchone()[0] == SCHEMA_VERSION
+        conn.execute("DROP TABLE meta")
+    # Up-to-date databases skip the schema script entirely.
+    ensure_database()
+    with sqlite3.connect(temp_db) as conn:
+        assert conn.execute("SELECT name FROM sqlite_master WHERE name='meta'").fetchone() is None
+
+
+def test_ensure_database_initializes_each_path_once(tmp_path, monkeypatch) -> None:
+    current = Settings(database_path=str(tmp_path / "once.db"))
+    ensure_database(current)
+    opened = []
+    real_connect = sqlite3.connect
+    monkeypatch.setattr(
+        sqlite3, "connect", lambda *args: opened.append(args) or real_connect(*args)
+    )
+    ensure_database(current)
+    assert opened == []
+    (tmp_path / "once.db").unlink()
+    ensure_database(current)
+    assert len(opened) == 1
+    assert (tmp_path / "once.db").exists()
+
+
+def test_schema_indexes_fetched_at_columns(memory_db) -> None:
+    indexes = {
+        row[0] for row in memory_db.execute("SELECT name FROM sqlite_master WHERE type='index'")
+    }
+    assert {
+        "idx_osv_fetched",
+        "idx_osv_vuln_fetched",
+        "idx_kev_fetched",
+        "idx_epss_fetched",
+    } <= indexes
+
+
+def test_database_uses_wal_journal(temp_db) -> None:
+    with db() as conn:
+        assert conn.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+        assert conn.execute("PRAGMA synchronous").fetchone()[0] == 1  # NORMAL
+
+
+def test_mmap_size_follows_settings(tmp_path) -> None:
+    for mmap_size in (0, 1 << 20):
+        current = Settings(database_path=str(tmp_path / "db.sqlite"), sqlite_mmap_size=mmap_size)
+        with db(current) as conn:
+            assert conn.execute("PRAGMA mmap_size").fetchone()[0] == mmap_size
+        close_connections()
+
+
+def test_get_meta_caches_committed_values(temp_db) -> None:
+    set_meta("k", "v1")
+    with sqlite3.connect(temp_db) as conn:
+        conn.execute("UPDATE meta SET value='changed elsewhere' WHERE key='k'")
+    assert get_meta("k") == "v1"
+    delete_meta("k")
+    assert get_meta("k") is None
+
+
+def test_meta_written_in_rolled_back_transaction_is_not_cached(temp_db) -> None:
+    set_meta("k", "before")
+    with pytest.raises(RuntimeError):
+        with db():
+            set_meta("k", "after")
+            assert get_meta("k") == "after"
+            raise RuntimeError("boom")
+    assert get_meta("k") == "before"
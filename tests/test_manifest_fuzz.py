@@ -324,12 +324,13 @@ def test_json_manifest_non_object_roots_do_not_crash(
 )
 def test_cli_generated_malformed_structured_manifests_fail_cleanly(
     tmp_path: Path,
+    temp_db: Path,
     manifest_name: str,
     builder: CaseBuilder,
     seed: int,
+    runner: CliRunner,
 ) -> None:
     rng = random.Random(seed)
-    runner = CliRunner()
 
     for index in range(40):
         content = ""
@@ -356,12 +357,13 @@ def test_cli_generated_malformed_structured_manifests_fail_cleanly(
 )
 def test_cli_generated_text_manifests_do_not_crash(
     tmp_path: Path,
+    temp_db: Path,
     manifest_name: str,
     builder: CaseBuilder,
     seed: int,
+    runner: CliRunner,
 ) -> None:
     rng = random.Random(seed)
-    runner = CliRunner()
 
     for index in range(60):
         case_dir = tmp_path / f"txt_case_{index:03d}"
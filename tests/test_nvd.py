@@ -1,18 +1,60 @@
 from __future__ import annotations
 
 import asyncio
+import time
 from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
 
 import httpx
 import pytest
+from tenacity import wait_none
 
 import vulnscanner.nvd as nvd
+from vulnscanner.config import Settings
+from vulnscanner.db import db
+
+_JAN1 = datetime(2024, 1, 1, tzinfo=timezone.utc)
+_JAN2 = datetime(2024, 1, 2, tzinfo=timezone.utc)
+_FEB15 = datetime(2024, 2, 15, tzinfo=timezone.utc)
+_AUG1 = datetime(2024, 8, 1, tzinfo=timezone.utc)
+
+
+@pytest.fixture(autouse=True)
+def _nvd_settings(monkeypatch: pytest.MonkeyPatch) -> None:
+    # Keep NVD_API_KEY and friends in the environment from changing behavior.
+    monkeypatch.setattr(
+        nvd,
+        "settings",
+        Settings(
+            nvd_api_key=None,
+            nvd_max_per_30s=5,
+            nvd_max_days_per_request=3,
+            nvd_rate_limiter="window",
+        ),
+    )
 
 
 def test_normalize_iso8601_preserves_z_suffix() -> None:
     assert nvd._normalize_iso8601("2024-08-01T00:00:00Z") == "2024-08-01T00:00:00Z"
 
 
+@pytest.mark.parametrize(
+    ("value", "expected"),
+    [
+        ("2024-08-01T10:30:00.000", "2024-08-01T10:30:00Z"),
+        ("2024-08-01T10:30:00.123", "2024-08-01T10:30:00.123000Z"),
+        ("2024-08-01T10:30:00", "2024-08-01T10:30:00Z"),
+        ("2024-08-01T10:30:00.000001", "2024-08-01T10:30:00.000001Z"),
+        ("2024-02-29T23:59:59", "2024-02-29T23:59:59Z"),
+        ("2024-13-45T99:99:99", "2024-13-45T99:99:99"),
+        ("2023-02-29T00:00:00", "2023-02-29T00:00:00"),
+        ("0000-01-01T00:00:00", "0000-01-01T00:00:00"),
+    ],
+)
+def test_normalize_iso8601_treats_naive_nvd_timestamps_as_utc(value: str, expected: str) -> None:
+    assert nvd._normalize_iso8601(value) == expected
+
+
 def test_normalize_iso8601_converts_offset_to_utc() -> None:
     assert nvd._normalize_iso8601("2024-08-01T05:30:00+05:30") == "2024-08-01T00:00:00Z"
 
@@ -33,17 +75,32 @@ def test_format_nvd_datetime_normalizes_timezone() -> None:
 def test_get_last_mod_time_parses_z_value(monkeypatch) -> None:
     monkeypatch.setattr(nvd, "get_meta", lambda _k: "2024-08-01T00:00:00Z")
     parsed = nvd._get_last_mod_time()
-    assert parsed == datetime(2024, 8, 1, 0, 0, 0, tzinfo=timezone.utc)
+    assert parsed == _AUG1
+
+
+def test_window_clamp_caps_last_slice_at_end() -> None:
+    start = _JAN1
+    window = nvd.NvdDeltaWindow(start=start, end=start + timedelta(days=366))
+    slices = window.clamp(timedelta(days=120))
+    assert [(s.end - s.start).days for s in slices] == [120, 120, 120, 6]
+    assert slices[0].start == start
+    assert slices[-1].end == window.end
+    assert all(a.end == b.start for a, b in zip(slices, slices[1:]))
+
+
+def test_window_clamp_returns_nothing_for_empty_window() -> None:
+    start = _JAN1
+    assert nvd.NvdDeltaWindow(start=start, end=start).clamp(timedelta(days=120)) == []
 
 
 def test_should_fail_empty_sync_for_long_zero_result_window() -> None:
-    start = datetime(2024, 1, 1, tzinfo=timezone.utc)
-    end = datetime(2024, 2, 15, tzinfo=timezone.utc)
+    start = _JAN1
+    end = _FEB15
     assert nvd._should_fail_empty_sync(start, end, saved=0, pages=15) is True
 
 
 def test_should_not_fail_empty_sync_for_short_window() -> None:
-    start = datetime(2024, 1, 1, tzinfo=timezone.utc)
+    start = _JAN1
     end = datetime(2024, 1, 5, tzinfo=timezone.utc)
     assert nvd._should_fail_empty_sync(start, end, saved=0, pages=3) is False
 
@@ -83,7 +140,9 @@ def test_is_suspicious_empty_page() -> None:
     assert nvd._is_suspicious_empty_page(0, 0) is False
 
 
-def test_sync_nvd_delta_fails_for_long_zero_result_window(monkeypatch: pytest.MonkeyPatch) -> None:
+def test_sync_nvd_delta_fails_for_long_zero_result_window(
+    temp_db, monkeypatch: pytest.MonkeyPatch
+) -> None:
     class _Client:
         async def fetch_page(self, *_args, **_kwargs):
             return {"totalResults": 0, "resultsPerPage": 2000, "vulnerabilities": []}
@@ -95,14 +154,16 @@ def test_sync_nvd_delta_fails_for_long_zero_result_window(monkeypatch: pytest.Mo
     monkeypatch.setattr(nvd, "NvdClient", _Client)
     monkeypatch.setattr(nvd, "_set_last_mod_time", lambda dt: set_calls.append(dt))
 
-    start = datetime(2024, 1, 1, tzinfo=timezone.utc)
-    end = datetime(2024, 2, 15, tzinfo=timezone.utc)
+    start = _JAN1
+    end = _FEB15
     with pytest.raises(RuntimeError, match="zero CVEs over a long time window"):
         asyncio.run(nvd.sync_nvd_delta(since=start, until=end))
     assert set_calls == []
 
 
-def test_sync_nvd_delta_fails_on_suspicious_empty_page(monkeypatch: pytest.MonkeyPatch) -> None:
+def test_sync_nvd_delta_fails_on_suspicious_empty_page(
+    temp_db, monkeypatch: pytest.MonkeyPatch
+) -> None:
     class _Client:
         async def fetch_page(self, *_args, **_kwargs):
             return {"totalResults": 10, "resultsPerPage": 2000, "vulnerabilities": []}
@@ -114,14 +175,14 @@ def test_sync_nvd_delta_fails_on_suspicious_empty_page(monkeypatch: pytest.Monke
     monkeypatch.setattr(nvd, "NvdClient", _Client)
     monkeypatch.setattr(nvd, "_set_last_mod_time", lambda dt: set_calls.append(dt))
 
-    start = datetime(2024, 1, 1, tzinfo=timezone.utc)
+    start = _JAN1
     end = start + timedelta(hours=6)
     with pytest.raises(RuntimeError, match="empty vulnerabilities page"):
         asyncio.run(nvd.sync_nvd_delta(since=start, until=end))
     assert set_calls == []
 
 
-def test_sync_nvd_delta_allows_short_empty_window(monkeypatch: pytest.MonkeyPatch) -> None:
+def test_sync_nvd_delta_allows_short_empty_window(temp_db, monkeypatch: pytest.MonkeyPatch) -> None:
     class _Client:
         async def fetch_page(self, *_args, **_kwargs):
             return {"totalResults": 0, "resultsPerPage": 2000, "vulnerabilities": []}
@@ -130,11 +191,346 @@ def test_sync_nvd_delta_allows_short_empty_window(monkeypatch: pytest.MonkeyPatc
             return None
 
     set_calls: list[datetime] = []
+    checkpoints: list[object] = []
     monkeypatch.setattr(nvd, "NvdClient", _Client)
     monkeypatch.setattr(nvd, "_set_last_mod_time", lambda dt: set_calls.append(dt))
+    monkeypatch.setattr(nvd, "checkpoint", lambda: checkpoints.append(None))
 
-    start = datetime(2024, 1, 1, tzinfo=timezone.utc)
+    start = _JAN1
     end = start + timedelta(hours=6)
     stats = asyncio.run(nvd.sync_nvd_delta(since=start, until=end))
     assert stats == {"cves": 0, "pages": 1}
     assert set_calls == [end]
+    assert checkpoints == []
+
+
+def test_save_vulnerabilities_skips_invalid_rows(memory_db) -> None:
+    vulns = [
+        {"cve": {"id": "CVE-2024-0001", "lastModified": "2024-08-01T00:00:00Z"}},
+        {"cve": {"id": "CVE-2024-0002"}, "lastModified": "2024-08-02T05:30:00+05:30"},
+        {"cve": {"lastModified": "2024-08-01T00:00:00Z"}},
+        {"cve": {"id": "CVE-2024-0003"}},
+    ]
+    assert nvd._save_vulnerabilities(vulns, conn=memory_db) == 2
+    rows = memory_db.execute("SELECT cve_id, source, modified FROM cves ORDER BY cve_id").fetchall()
+    assert rows == [
+        ("CVE-2024-0001", "NVD", "2024-08-01T00:00:00Z"),
+        ("CVE-2024-0002", "NVD", "2024-08-02T00:00:00Z"),
+    ]
+
+
+def test_save_vulnerabilities_keeps_the_newest_version(memory_db) -> None:
+    def _item(modified: str, title: str) -> dict:
+        return {"cve": {"id": "CVE-2024-0001", "lastModified": modified, "title": title}}
+
+    nvd._save_vulnerabilities([_item("2024-08-01T10:30:00.123", "newer")], conn=memory_db)
+    nvd._save_vulnerabilities([_item("2024-08-01T10:30:00.000", "older")], conn=memory_db)
+    assert memory_db.execute("SELECT modified FROM cves").fetchone()[0] == (
+        "2024-08-01T10:30:00.123000Z"
+    )
+    nvd._save_vulnerabilities([_item("2024-08-02T00:00:00Z", "newest")], conn=memory_db)
+    (blob,) = memory_db.execute("SELECT json FROM cves").fetchone()
+    assert b"newest" in blob
+
+
+def test_save_pages_rolls_back_the_whole_batch(temp_db) -> None:
+    good = [{"cve": {"id": "CVE-2024-0001", "lastModified": "2024-08-01T00:00:00Z"}}]
+    bad = [{"cve": {"id": "CVE-2024-0002", "lastModified": "2024-08-01T00:00:00Z"}, "x": {1}}]
+    with pytest.raises(TypeError):
+        nvd._save_pages([good, bad])
+    with db() as conn:
+        assert conn.execute("SELECT COUNT(*) FROM cves").fetchone()[0] == 0
+    assert nvd._save_pages([good, good]) == 2
+
+
+def test_write_lock_is_shared_within_an_event_loop_only() -> None:
+    async def _locks() -> tuple[asyncio.Lock, asyncio.Lock]:
+        return nvd._write_lock(), nvd._write_lock()
+
+    first, again = asyncio.run(_locks())
+    other, _ = asyncio.run(_locks())
+    assert first is again
+    assert first is not other
+
+
+def test_rate_limiter_drops_calls_outside_window() -> None:
+    limiter = nvd.RateLimiter(max_per_30s=2)
+    now = time.monotonic()
+    limiter.calls.extend([now - 45.0, now - 31.0])
+    asyncio.run(limiter.wait())
+    assert len(limiter.calls) == 1
+    assert limiter.calls[0] >= now
+
+
+def test_paced_rate_limiter_spaces_calls_without_burst(monkeypatch: pytest.MonkeyPatch) -> None:
+    clock = [100.0]
+    sleeps: list[float] = []
+
+    async def _sleep(seconds: float) -> None:
+        sleeps.append(seconds)
+
+    monkeypatch.setattr(nvd.time, "monotonic", lambda: clock[0])
+    monkeypatch.setattr(nvd.asyncio, "sleep", _sleep)
+    limiter = nvd.PacedRateLimiter(max_per_30s=5)
+
+    async def _run() -> None:
+        for _ in range(3):
+            await limiter.wait()
+        clock[0] += 60.0
+        await limiter.wait()
+
+    asyncio.run(_run())
+    assert sleeps == [6.0, 12.0]
+
+
+def test_nvd_client_selects_rate_limiter_from_settings(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(nvd, "settings", Settings(nvd_max_per_30s=5, nvd_rate_limiter="paced"))
+    client = nvd.NvdClient(transport=httpx.MockTransport(lambda _request: httpx.Response(200)))
+    assert isinstance(client.rate_limiter, nvd.PacedRateLimiter)
+    monkeypatch.setattr(nvd, "settings", Settings(nvd_max_per_30s=5, nvd_rate_limiter="bogus"))
+    client = nvd.NvdClient(transport=httpx.MockTransport(lambda _request: httpx.Response(200)))
+    assert isinstance(client.rate_limiter, nvd.RateLimiter)
+
+
+def test_fetch_page_streams_counters_and_vulnerabilities() -> None:
+    body = {
+        "resultsPerPage": 2,
+        "startIndex": 0,
+        "totalResults": 2,
+        "format": "NVD_CVE",
+        "vulnerabilities": [
+            {"cve": {"id": "CVE-2024-0001", "metrics": {"baseScore": 9.8}}},
+            {"cve": {"id": "CVE-2024-0002", "metrics": {"baseScore": 5}}},
+        ],
+    }
+
+    seen_headers = []
+
+    def _handler(request: httpx.Request) -> httpx.Response:
+        seen_headers.append(request.headers)
+        return httpx.Response(200, json=body)
+
+    async def _fetch() -> dict:
+        async with httpx.AsyncClient(transport=httpx.MockTransport(_handler)) as http:
+            client = nvd.NvdClient(http)
+            start = _AUG1
+            page = await client.fetch_page(start, start + timedelta(days=1))
+            await client.aclose()
+            assert not http.is_closed
+            return page
+
+    page = asyncio.run(_fetch())
+    assert page == {
+        "totalResults": 2,
+        "resultsPerPage": 2,
+        "startIndex": 0,
+        "vulnerabilities": body["vulnerabilities"],
+    }
+    assert seen_headers[0]["User-Agent"] == nvd.settings.user_agent
+
+
+def test_read_nvd_page_tokenizes_body_once(monkeypatch: pytest.MonkeyPatch) -> None:
+    real_ijson = nvd.ijson
+    parsers: list[str] = []
+
+    class _CountingIjson:
+        def __getattr__(self, name: str):
+            attr = getattr(real_ijson, name)
+            if not name.endswith("_coro"):
+                return attr
+
+            def _counted(*args, **kwargs):
+                parsers.append(name)
+                return attr(*args, **kwargs)
+
+            return _counted
+
+    monkeypatch.setattr(nvd, "ijson", _CountingIjson())
+    body = {
+        "resultsPerPage": 1,
+        "startIndex": 0,
+        "totalResults": 1,
+        "format": "NVD_CVE",
+        "vulnerabilities": [{"cve": {"id": "CVE-2024-0001"}}],
+    }
+    page = _fetch_page_via(lambda _request: httpx.Response(200, json=body))
+    assert len(parsers) == 1
+    assert page == {
+        "resultsPerPage": 1,
+        "startIndex": 0,
+        "totalResults": 1,
+        "vulnerabilities": [{"cve": {"id": "CVE-2024-0001"}}],
+    }
+
+
+def _fetch_page_via(handler, *, has_api_key: bool = False) -> dict:
+    async def _fetch() -> dict:
+        client = nvd.NvdClient(transport=httpx.MockTransport(handler))
+        client.has_api_key = has_api_key
+        start = _AUG1
+        try:
+            return await client.fetch_page(start, start + timedelta(days=1))
+        finally:
+            await client.aclose()
+            assert client.client.is_closed
+
+    return asyncio.run(_fetch())
+
+
+def test_fetch_page_treats_404_without_api_key_as_empty() -> None:
+    page = _fetch_page_via(lambda _request: httpx.Response(404, text="Not Found"))
+    assert page == {"totalResults": 0, "resultsPerPage": 0, "vulnerabilities": []}
+
+
+def test_fetch_page_raises_on_404_with_api_key() -> None:
+    def _handler(_request: httpx.Request) -> httpx.Response:
+        return httpx.Response(404, json={"message": "Invalid apiKey"})
+
+    with pytest.raises(RuntimeError, match="Upstream message: Invalid apiKey"):
+        _fetch_page_via(_handler, has_api_key=True)
+
+
+def test_fetch_page_retries_then_raises_on_http_error(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(nvd.NvdClient.fetch_page.retry, "wait", wait_none())
+    attempts = []
+
+    def _handler(request: httpx.Request) -> httpx.Response:
+        attempts.append(request)
+        return httpx.Response(503, text="Service Unavailable")
+
+    with pytest.raises(httpx.HTTPStatusError):
+        _fetch_page_via(_handler)
+    assert len(attempts) == 5
+
+
+def test_sync_nvd_delta_saves_pages_from_all_windows(
+    temp_db, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    class _Client:
+        async def fetch_page(self, start, _end, start_index=0):
+            cve_id = f"CVE-{start:%m%d}-{start_index}"
+            return {
+                "totalResults": 2,
+                "resultsPerPage": 1,
+                "vulnerabilities": [
+                    {"cve": {"id": cve_id, "lastModified": "2024-01-01T00:00:00Z"}}
+                ],
+            }
+
+        async def aclose(self) -> None:
+            return None
+
+    monkeypatch.setattr(nvd, "NvdClient", _Client)
+    monkeypatch.setattr(nvd, "_set_last_mod_time", lambda _dt: None)
+
+    start = _JAN1
+    stats = asyncio.run(nvd.sync_nvd_delta(since=start, until=start + timedelta(days=6)))
+    assert stats == {"cves": 4, "pages": 4}
+    with db() as conn:
+        ids = [row[0] for row in conn.execute("SELECT cve_id FROM cves ORDER BY cve_id")]
+    assert ids == ["CVE-0101-0", "CVE-0101-1", "CVE-0104-0", "CVE-0104-1"]
+
+
+def test_sync_nvd_delta_pagination(temp_db, monkeypatch: pytest.MonkeyPatch) -> None:
+    pages = {
+        0: {
+            "totalResults": 3000,
+            "resultsPerPage": 2000,
+            "vulnerabilities": [
+                {"cve": {"id": "CVE-2024-0001", "lastModified": "2024-01-01T00:00:00Z"}}
+            ],
+        },
+        2000: {
+            "totalResults": 3000,
+            "resultsPerPage": 2000,
+            "vulnerabilities": [
+                {"cve": {"id": "CVE-2024-0002", "lastModified": "2024-01-01T00:00:00Z"}}
+            ],
+        },
+    }
+
+    class _CountingFetcher:
+        def __init__(self) -> None:
+            self.start_indexes: list[int] = []
+
+        async def __call__(self, _start, _end, start_index=0):
+            self.start_indexes.append(start_index)
+            return pages[start_index]
+
+    async def _aclose() -> None:
+        return None
+
+    mock_client = SimpleNamespace(fetch_page=_CountingFetcher(), aclose=_aclose)
+    monkeypatch.setattr(nvd, "NvdClient", lambda: mock_client)
+    monkeypatch.setattr(nvd, "_set_last_mod_time", lambda _dt: None)
+
+    start = _JAN1
+    stats = asyncio.run(nvd.sync_nvd_delta(since=start, until=start + timedelta(days=1)))
+    assert stats == {"cves": 2, "pages": 2}
+    assert mock_client.fetch_page.start_indexes == [0, 2000]
+
+
+def test_sync_window_holds_a_bounded_number_of_pages_for_a_slow_writer() -> None:
+    held = 0
+    peak = 0
+
+    class _Client:
+        async def fetch_page(self, _start, _end, start_index=0):
+            nonlocal held, peak
+            await asyncio.sleep(0)
+            held += 1
+            peak = max(peak, held)
+            return {
+                "totalResults": 40,
+                "resultsPerPage": 1,
+                "vulnerabilities": [{"cve": {"id": f"CVE-2024-{start_index}"}}],
+            }
+
+    async def _run() -> int:
+        queue: asyncio.Queue = asyncio.Queue(nvd.WRITE_QUEUE_SIZE)
+
+        async def _slow_writer() -> None:
+            nonlocal held
+            while True:
+                await queue.get()
+                held -= 1
+                await asyncio.sleep(0.001)
+
+        writer = asyncio.create_task(_slow_writer())
+        try:
+            return await nvd._sync_window(_Client(), nvd.NvdDeltaWindow(_JAN1, _JAN2), queue)
+        finally:
+            writer.cancel()
+
+    assert asyncio.run(_run()) == 40
+    assert peak <= nvd.MAX_CONCURRENT_PAGES + nvd.WRITE_QUEUE_SIZE
+
+
+def test_sync_window_fetches_remaining_pages_concurrently() -> None:
+    in_flight = 0
+    peak = 0
+    fetched: list[int] = []
+
+    class _Client:
+        async def fetch_page(self, _start, _end, start_index=0):
+            nonlocal in_flight, peak
+            in_flight += 1
+            peak = max(peak, in_flight)
+            await asyncio.sleep(0.01)
+            in_flight -= 1
+            fetched.append(start_index)
+            return {
+                "totalResults": 10,
+                "resultsPerPage": 1,
+                "vulnerabilities": [{"cve": {"id": f"CVE-2024-{start_index}"}}],
+            }
+
+    async def _run() -> tuple[int, int]:
+        queue: asyncio.Queue = asyncio.Queue()
+        window = nvd.NvdDeltaWindow(_JAN1, _JAN2)
+        pages = await nvd._sync_window(_Client(), window, queue)
+        return pages, queue.qsize()
+
+    assert asyncio.run(_run()) == (10, 10)
+    assert sorted(fetched) == list(range(10))
+    assert peak == nvd.MAX_CONCURRENT_PAGES